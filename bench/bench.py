@@ -0,0 +1,255 @@
+"""Benchmark für die Verarbeitungspipeline von ipt.py.
+
+Erzeugt einen synthetischen Eingabe-Korpus (Ordner mit 001-004 und einem Bilderordner), ersetzt pingo, jpegoptim,
+ECT, guetzli und 7-Zip durch lokale Platzhalter mit einstellbarer Latenz und misst die Schritte von process_images
+einzeln (scan, select, copy, integrity, render, validate, optimize, archive, move).
+
+Beispiele:
+    python bench/bench.py --folders 3 --images 60 --save-baseline bench/baseline.json
+    python bench/bench.py --folders 3 --images 60 --baseline bench/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import ipt  # noqa: E402
+
+# Reihenfolge der Schritte in Ausgabe und Vergleich
+STAGES = ["scan", "select", "copy", "integrity", "render", "validate", "optimize", "archive", "move"]
+
+# Platzhalter für die Bild-Tools: lesen die Datei (I/O wie das echte Tool) und warten die eingestellte Latenz ab.
+# Die Pfade stehen wie bei optimize_single_image immer am Ende, davor beliebige Optionen (auch mit Werten wie "--quality 85")
+IMAGE_TOOL_TEMPLATE = '''import sys, time
+LATENCY = {latency}
+paths = sys.argv[-{path_count}:]
+with open(paths[0], "rb") as f:
+    data = f.read()
+if len(paths) > 1:  # guetzli schreibt in eine eigene Ausgabedatei
+    with open(paths[1], "wb") as f:
+        f.write(data)
+time.sleep(LATENCY)
+'''
+
+# Anzahl der Pfade am Ende der Kommandozeile (Eingabe und ggf. Ausgabe)
+IMAGE_TOOL_PATH_COUNTS = {"guetzli": 2}
+
+# Platzhalter für 7-Zip: "a -tzip <ausgabe> <eingaben...> -m..." mit zipfile nachgebildet
+ARCHIVE_TOOL_TEMPLATE = '''import os, sys, time, zipfile
+LATENCY = {latency}
+args = [arg for arg in sys.argv[2:] if not arg.startswith("-")]
+method = zipfile.ZIP_BZIP2 if any("BZip2" in arg for arg in sys.argv) else zipfile.ZIP_DEFLATED
+with zipfile.ZipFile(args[0], "w", method) as archive:
+    for path in args[1:]:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    full_path = os.path.join(root, name)
+                    archive.write(full_path, os.path.relpath(full_path, os.path.dirname(path)))
+        else:
+            archive.write(path, os.path.basename(path))
+time.sleep(LATENCY)
+'''
+
+def parse_latencies(value):
+    """Liest "pingo=0.05,ect=0.2" in ein Dictionary (Sekunden je Aufruf)."""
+    latencies = {}
+    for item in filter(None, value.split(",")):
+        tool, _, seconds = item.partition("=")
+        latencies[tool.strip()] = float(seconds)
+    return latencies
+
+def write_stand_in(bin_folder, name, source):
+    """Legt ein ausführbares Platzhalter-Tool an (Shebang unter Unix, .cmd-Wrapper unter Windows)."""
+    script_path = os.path.join(bin_folder, f"{name}.py")
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(source)
+
+    if os.name == "nt":
+        launcher = os.path.join(bin_folder, f"{name}.cmd")
+        with open(launcher, "w", encoding="utf-8") as f:
+            f.write(f'@"{sys.executable}" "{script_path}" %*\n')
+    else:
+        launcher = os.path.join(bin_folder, name)
+        with open(launcher, "w", encoding="utf-8") as f:
+            f.write(f"#!{sys.executable}\n{source}")
+        os.chmod(launcher, 0o755)
+    return launcher
+
+def make_image(rng, width, height, path):
+    """Erzeugt ein Bild mit weichem Rauschen (komprimiert ähnlich wie ein Foto, deterministisch über rng)."""
+    tile = Image.frombytes("RGB", (max(1, width // 8), max(1, height // 8)), rng.randbytes(max(1, width // 8) * max(1, height // 8) * 3))
+    img = tile.resize((width, height), Image.BICUBIC)
+    if path.lower().endswith(".png"):
+        img.save(path, optimize=False)
+    else:
+        img.save(path, quality=90)
+
+def build_corpus(corpus_folder, args):
+    """Legt args.folders Job-Ordner an: 001-004 im Basisordner (außer mit --no-collage) und args.images Bilder im Bilderordner."""
+    rng = random.Random(args.seed)
+    folders = []
+    for index in range(args.folders):
+        base_folder = os.path.join(corpus_folder, f"job{index + 1:03}")
+        image_folder = os.path.join(base_folder, f"Album {index + 1:03}")
+        os.makedirs(image_folder)
+
+        for name in ([] if args.no_collage else ipt.COLLAGE_CANDIDATES):
+            ext = ".png" if rng.random() < args.png_ratio else ".jpg"
+            make_image(rng, args.width, args.height, os.path.join(base_folder, name + ext))
+
+        for image_index in range(args.images):
+            ext = ".png" if rng.random() < args.png_ratio else ".jpg"
+            width, height = (args.width, args.height) if rng.random() < 0.8 else (args.height, args.width)
+            make_image(rng, width, height, os.path.join(image_folder, f"{image_index + 1:04}{ext}"))
+
+        with open(os.path.join(image_folder, "ComicInfo.xml"), "w", encoding="utf-8") as f:
+            f.write("<ComicInfo><Title>Benchmark</Title></ComicInfo>\n" * 50)
+        folders.append((base_folder, image_folder))
+    return folders
+
+def build_config(work_folder, args):
+    """Config aus src/config.json, alle Pfade im Arbeitsordner und alle Tools durch Platzhalter ersetzt."""
+    with open(os.path.join(os.path.dirname(ipt.__file__), "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    for key in ("output_folder", "temp_folder", "cache_folder"):
+        config['paths'][key] = os.path.join(work_folder, key.replace("_folder", ""))
+    config['logging'].update(log_folder=os.path.join(work_folder, "logs"), log_mode="append", log_override="default")
+    config['parameters'].update(batch_mode=0, loglevel=args.loglevel, debug=0, cache=args.cache, incremental=0)
+
+    bin_folder = os.path.join(work_folder, "bin")
+    os.makedirs(bin_folder, exist_ok=True)
+    latencies = parse_latencies(args.latency)
+    for tool, data in config['tools'].items():
+        template = ARCHIVE_TOOL_TEMPLATE if tool == "7zip" else IMAGE_TOOL_TEMPLATE
+        source = template.format(latency=latencies.get(tool, args.default_latency),
+                                 path_count=IMAGE_TOOL_PATH_COUNTS.get(tool, 1))
+        data['path'] = write_stand_in(bin_folder, tool, source)
+        data['timeout'] = 0
+    for profile in config['compression_profiles'].values():
+        if profile.get("engine") != "zipfile":
+            profile['path'] = config['tools']['7zip']['path']
+    return config
+
+def run_benchmark(folders, config, args):
+    """Verarbeitet alle Ordner args.runs-mal und sammelt die Schrittzeiten je Lauf."""
+    pipeline = ipt.Pipeline(config)
+    runs = []
+    for _ in range(args.runs):
+        shutil.rmtree(config['paths']['output_folder'], ignore_errors=True)
+        os.makedirs(config['paths']['output_folder'])
+        run = {stage: 0.0 for stage in STAGES}
+        start_time = time.perf_counter()
+        for base_folder, image_folder in folders:
+            output = io.StringIO() if not args.verbose else sys.stdout
+            with contextlib.redirect_stdout(output):
+                pipeline.process_folder(base_folder, image_folder)
+            for stage, seconds in ipt.STAGE_TIMES.items():
+                run[stage] = run.get(stage, 0.0) + seconds
+        run["total"] = time.perf_counter() - start_time
+        runs.append(run)
+    ipt.flush_log()
+    return runs
+
+def summarize(runs):
+    """Median, Minimum und Maximum je Schritt über alle Läufe."""
+    summary = {}
+    for stage in runs[0]:
+        values = [run.get(stage, 0.0) for run in runs]
+        summary[stage] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    return summary
+
+def compare(results, baseline, tolerance, min_delta):
+    """Vergleicht die Mediane mit der Baseline. Liefert die Liste der Schritte, die deutlich langsamer geworden sind."""
+    regressions = []
+    print(f"\n{'Schritt':<10} {'Baseline':>10} {'Aktuell':>10} {'Faktor':>8}")
+    for stage, current in results["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if reference is None:
+            print(f"{stage:<10} {'-':>10} {current['median']:>9.3f}s {'neu':>8}")
+            continue
+        ratio = current["median"] / reference["median"] if reference["median"] > 0 else float("inf")
+        regressed = current["median"] - reference["median"] > min_delta and ratio > 1 + tolerance
+        print(f"{stage:<10} {reference['median']:>9.3f}s {current['median']:>9.3f}s {ratio:>7.2f}x" + ("  <-- langsamer" if regressed else ""))
+        if regressed:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der ipt-Pipeline mit synthetischem Korpus und Platzhalter-Tools")
+    parser.add_argument("--folders", type=int, default=2, help="Anzahl der Job-Ordner")
+    parser.add_argument("--images", type=int, default=80, help="Bilder je Bilderordner")
+    parser.add_argument("--width", type=int, default=800, help="Bildbreite in Pixeln")
+    parser.add_argument("--height", type=int, default=1200, help="Bildhöhe in Pixeln")
+    parser.add_argument("--png-ratio", type=float, default=0.1, help="Anteil der PNG-Dateien (0-1)")
+    parser.add_argument("--no-collage", action="store_true", help="Ohne 001-004, misst die automatische Auswahl (select)")
+    parser.add_argument("--latency", default="", help="Latenz je Tool in Sekunden, z.B. \"pingo=0.05,ect=0.2,7zip=0.5\"")
+    parser.add_argument("--default-latency", type=float, default=0.02, help="Latenz für nicht aufgeführte Tools")
+    parser.add_argument("--runs", type=int, default=3, help="Anzahl der Messläufe (Median wird verglichen)")
+    parser.add_argument("--seed", type=int, default=1, help="Startwert für den Korpus")
+    parser.add_argument("--cache", type=int, default=0, help="Bild-Cache verwenden (0/1)")
+    parser.add_argument("--loglevel", type=int, default=1, help="Log-Level während der Messung")
+    parser.add_argument("--work", default=None, help="Arbeitsordner (Standard: temporär, wird danach gelöscht)")
+    parser.add_argument("--output", default=None, help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--baseline", default=None, help="Mit dieser Baseline vergleichen, Exit-Code 1 bei Verschlechterung")
+    parser.add_argument("--save-baseline", default=None, help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Erlaubte relative Verschlechterung je Schritt")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Kleinere absolute Abweichungen (Sekunden) werden ignoriert")
+    parser.add_argument("--verbose", action="store_true", help="Ausgaben von ipt.py anzeigen")
+    args = parser.parse_args()
+
+    work_folder = args.work or tempfile.mkdtemp(prefix="ipt_bench_")
+    try:
+        corpus_folder = os.path.join(work_folder, "corpus")
+        shutil.rmtree(corpus_folder, ignore_errors=True)
+        folders = build_corpus(corpus_folder, args)
+        config = build_config(work_folder, args)
+
+        runs = run_benchmark(folders, config, args)
+        results = {
+            "meta": {"script_version": ipt.SCRIPT_VERSION, "python": platform.python_version(), "platform": platform.platform(),
+                     "cpus": os.cpu_count(), "folders": args.folders, "images": args.images, "width": args.width,
+                     "height": args.height, "png_ratio": args.png_ratio, "latency": args.latency,
+                     "default_latency": args.default_latency, "runs": args.runs, "seed": args.seed, "cache": args.cache},
+            "stages": summarize(runs),
+            "runs": runs,
+        }
+    finally:
+        if not args.work:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    print(f"{'Schritt':<10} {'Median':>10} {'Min':>10} {'Max':>10}")
+    for stage, values in results["stages"].items():
+        print(f"{stage:<10} {values['median']:>9.3f}s {values['min']:>9.3f}s {values['max']:>9.3f}s")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("images") != args.images or baseline.get("meta", {}).get("folders") != args.folders:
+            print("[WARN] Baseline wurde mit einem anderen Korpus erstellt, der Vergleich ist nur eingeschränkt aussagekräftig.")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"[ERROR] Langsamer als die Baseline: {', '.join(regressions)}")
+            sys.exit(1)
+        print("[INFO] Keine Verschlechterung gegenüber der Baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -4,59 +4,238 @@ import os
 import shutil
 from datetime import datetime
 import math
+import copy
+import time
 import tempfile
-from PIL import Image, ImageFilter
+import PIL
+from PIL import Image, ImageFilter, ImageStat, UnidentifiedImageError
 import hashlib
+import mmap
+import struct
 import subprocess
+import shlex
+import threading
+import queue
+import atexit
+import functools
+import contextlib
+import collections
+import itertools
 import zipfile
+import zlib
+import bz2
+import select
+import signal
+import socket
+import socketserver
+import ctypes
+import ctypes.util
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Tuple, Dict, Any
 
+# NumPy ist optional und wird erst beim ersten Rendern geladen (siehe load_numpy)
+np = None
+NUMPY_CHECKED: bool = False
+
+try:
+    import resource  # Nur unter Unix verfügbar, liefert CPU-Zeit der Kindprozesse und Spitzen-RSS für das Tracing
+except ImportError:
+    resource = None
+
+try:
+    import fcntl  # Nur unter Unix verfügbar, wird für Reflink-Kopien (FICLONE) benötigt
+except ImportError:
+    fcntl = None
+
 # Skript- und Konfigurationsversionen TEST VERION
 SCRIPT_VERSION: str = "0.9.2"
 MIN_CONFIG_VERSION: str = "0.9.1"
 
+# Tool-Aufrufe: Prüfintervall für Timeouts und das Wettrennen der Kompressionsprofile sowie Anzahl der Ausgabezeilen, die für Fehlermeldungen behalten werden
+TOOL_POLL_INTERVAL: float = 0.25
+TOOL_OUTPUT_TAIL: int = 20
+
+# Kompressionsverfahren des eingebauten ZIP-Packers (Kompressionsprofile mit "engine": "zipfile")
+ZIP_ENGINE_METHODS: Dict[str, int] = {"store": zipfile.ZIP_STORED, "deflate": zipfile.ZIP_DEFLATED, "bzip2": zipfile.ZIP_BZIP2}
+ZIP_METHOD_NAMES: Dict[int, str] = {method: name for name, method in ZIP_ENGINE_METHODS.items()}
+
+# Größe des Ausschnitts für die Probekompression bei der Verfahrenswahl je Eintrag ("method": "auto")
+ZIP_SAMPLE_SIZE: int = 64 * 1024
+
+# Name des eingebauten Pillow-Backends in Tool-Ketten (tool_order) und Tool-Parametern
+PILLOW_TOOL: str = "pillow"
+
+# Slots (Semaphoren) je Tool und Laufzeit-Protokoll aller Tool-Aufrufe (pro Prozess)
+TOOL_SLOTS: Dict[str, Any] = {}
+TOOL_SLOTS_LOCK = threading.Lock()
+TOOL_RUNS: List[Dict[str, Any]] = []
+TOOL_RUNS_LOCK = threading.Lock()
+
+# Namen und Endungen der Collage-Bilder im Basisordner
+COLLAGE_CANDIDATES: List[str] = ["001", "002", "003", "004"]
+COLLAGE_EXTENSIONS: List[str] = ['.jpg', '.jpeg', '.png']
+
+# Version des Manifest-Formats für den inkrementellen Batch
+MANIFEST_VERSION: int = 2
+
+# Puffergröße der Integritätsprüfung, Dateien ab MMAP_THRESHOLD werden per mmap gehasht
+INTEGRITY_CHUNK_SIZE: int = 1024 * 1024  # 1 MB
+MMAP_THRESHOLD: int = 16 * 1024 * 1024  # 16 MB
+
+# Parameter, die das Ergebnis nicht beeinflussen und daher nicht in den Config-Fingerabdruck eingehen
+MANIFEST_IGNORED_PARAMETERS: Tuple[str, ...] = ("loglevel", "debug", "batch_mode", "batch_workers", "optimize_workers",
+                                                "incremental", "cache", "cache_max_size_mb", "empty", "staging_mode",
+                                                "integrity_digest", "integrity_workers", "trace", "resume")
+
+# Journal der abgeschlossenen Verarbeitungsschritte im Temp-Ordner eines Ordners (JSON-Lines, nur bei resume = 1)
+JOURNAL_FILE: str = ".ipt_journal.jsonl"
+JOURNAL_VERSION: int = 1
+
+# ioctl-Nummer für Copy-on-Write-Klone unter Linux (btrfs, XFS, ...)
+FICLONE: int = 0x40049409
+
+# Staging-Strategien, die auf einem Ziel-Dateisystem bereits fehlgeschlagen sind (Strategie, st_dev)
+STAGING_UNSUPPORTED = set()
+
+# Verkleinerungsfaktor für den unscharfen Hintergrund: Die Unschärfe wird auf einem kleinen Zwischenbild berechnet
+BACKGROUND_REDUCTION: int = 8
+BACKGROUND_BLUR_RADIUS: int = 30
+
+# Ergebnisse der JPEG-Validierung je Datei-Hash ("<verfahren>:<hash>" → {"fast": ..., "deep": ...})
+VALIDATION_CACHE: Dict[str, Dict[str, bool]] = {}
+VALIDATION_CACHE_LOCK = threading.Lock()
+VALIDATION_CACHE_FILE: str = "validation_cache.json"
+
+# Bewertung der Kandidaten für die automatische Collage-Auswahl: Kantenlänge der reduzierten Dekodierung,
+# Gewichte der Teilbewertungen und Ergebnisse je Datei-Hash ("<verfahren>:<hash>:<größe>" → Messwerte)
+SELECTION_SIZE: int = 256
+SELECTION_WEIGHTS: Dict[str, float] = {"orientation": 2.0, "sharpness": 1.0, "exposure": 0.5, "position": 0.5}
+SELECTION_CACHE: Dict[str, Dict[str, float]] = {}
+SELECTION_CACHE_LOCK = threading.Lock()
+SELECTION_CACHE_FILE: str = "selection_cache.json"
+
+# Metadaten-Index (Pfad → (Breite, Höhe, EXIF-Orientierung)) aus reinen Header-Scans, wird je Ordner geleert
+IMAGE_INFO_INDEX: Dict[str, Tuple[int, int, int]] = {}
+IMAGE_INFO_LOCK = threading.Lock()
+
+# JPEG-Marker mit Bildgröße (SOF0-SOF15 ohne DHT, JPG und DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Trefferstatistik des Bild-Caches (pro Prozess)
+CACHE_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+CACHE_LOCK = threading.Lock()
+
+# Tool-Statistik für die adaptive Tool-Kette: Messwerte je "<profil>|<größe>|<pixel>|<tool>" (gespeichert und neu)
+TOOL_STATS: Dict[str, Any] = {"loaded": False, "entries": {}, "pending": {}}
+TOOL_STATS_LOCK = threading.Lock()
+TOOL_STATS_FILE: str = "tool_stats.json"
+TOOL_STATS_FIELDS: Tuple[str, ...] = ("runs", "input_bytes", "saved_bytes", "seconds", "useful")
+TOOL_STATS_SAMPLE_COUNTER = itertools.count()
+
+# Fingerabdrücke der Tool-Executables (Größe + Änderungszeit) als günstiger Ersatz für Versionsabfragen
+TOOL_FINGERPRINTS: Dict[str, str] = {}
+
+# Log-Datei wird ab dieser Größe umbenannt, Schreibvorgänge werden in Blöcken von bis zu LOG_BATCH_LINES Zeilen gebündelt
+MAX_LOG_SIZE: int = 5 * 1024 * 1024  # 5 MB
+LOG_BATCH_LINES: int = 500
+LOG_FLUSH_TIMEOUT: float = 30.0  # Maximale Wartezeit in flush_log() und beim Beenden des Log-Writers
+
+# Zeitstempel für den Namen der Log-Datei (wird in main() pro Lauf neu gesetzt)
+LOG_TIMESTAMP: str = datetime.now().strftime('%Y%m%d%H%M%S')
+
+# Zustand des Log-Writers: Queue, Hintergrund-Thread, Ziel-Datei und besitzender Prozess
+LOG_WRITER: Dict[str, Any] = {"queue": None, "thread": None, "file": None, "pid": None}
+LOG_WRITER_LOCK = threading.Lock()
+
+# Dienst-Modus: inotify-Ereignisse (IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM/TO, IN_CREATE, IN_DELETE),
+# Sonderereignisse, Abstand der Sicherheits-Vollscans und Umfang der Job-Historie
+INOTIFY_MASK: int = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+INOTIFY_Q_OVERFLOW: int = 0x4000
+INOTIFY_IGNORED: int = 0x8000
+DAEMON_FULL_SCAN_INTERVAL: float = 60.0
+DAEMON_JOB_HISTORY: int = 1000
+
+# Stufen-Pipeline im Batch: Ressourcenklasse je Verarbeitungsschritt und prozessübergreifende Slots je Klasse.
+# Der Slot "staged" begrenzt die Ordner, die bereitgestellt im Temp-Ordner auf die Optimierung warten.
+STAGE_RESOURCES: Dict[str, str] = {"scan": "io", "copy": "io", "integrity": "io", "validate": "io",
+                                   "optimize": "cpu", "archive": "archive", "move": "move"}
+PIPELINE_RESOURCES: Tuple[str, ...] = ("io", "cpu", "archive", "move")
+PIPELINE: Dict[str, Any] = {"slots": {}, "holds_temp": False}
+
+# Laufzeiten der Verarbeitungsschritte des zuletzt bearbeiteten Ordners in Sekunden (z.B. für bench/bench.py)
+STAGE_TIMES: Dict[str, float] = {}
+
+# Aufzeichnung der Spans (Chrome-Trace-Ereignisse) des aktuell bearbeiteten Ordners
+TRACE: Dict[str, Any] = {"enabled": False, "events": [], "origin": 0.0}
+TRACE_LOCK = threading.Lock()
+
+# Name des aktuell bearbeiteten Batch-Jobs (Log-Kontext, der Temp-Ordner kommt aus get_job_temp_name)
+JOB_NAME: str = ""
+
 ######################################################################## 
 ####                KONFIGURATION & EINSTELLUNGEN                   ####
 ######################################################################## 
 
-def load_config(file_path: str = "config.json") -> Dict[str, Any]:
-    with open(file_path, "r") as f:
-        config = json.load(f)
+class IptError(Exception):
+    """Basisklasse für Fehler, die bei Nutzung als Bibliothek statt sys.exit ausgelöst werden."""
 
-    # Versionsprüfung
+class ConfigError(IptError):
+    """Die Config fehlt, ist unlesbar oder hat eine inkompatible Version."""
+
+class ToolNotFoundError(IptError):
+    """Mindestens ein benötigtes Tool-Executable wurde nicht gefunden."""
+
+def check_config_version(config: Dict[str, Any]) -> None:
+    """Prüft, ob die Config-Version zum Skript passt."""
     config_version: str = config['program']['version']
     if config_version < MIN_CONFIG_VERSION:
-        print(f"[ERROR] Inkompatible Config-Version: {config_version}. Benötigt wird mindestens {MIN_CONFIG_VERSION}.")
-        sys.exit(1)
+        raise ConfigError(f"Inkompatible Config-Version: {config_version}. Benötigt wird mindestens {MIN_CONFIG_VERSION}.")
+
+def load_config(file_path: str = "config.json") -> Dict[str, Any]:
+    try:
+        with open(file_path, "r") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Config '{file_path}' konnte nicht geladen werden: {e}")
+
+    # Versionsprüfung
+    check_config_version(config)
 
     return config
 
-config: Dict[str, Any] = load_config()
-print(f"{config['program']['name']} - Version {SCRIPT_VERSION}\nCopyright 2025 HBB under AGPLv3")
+# Aktive Config: wird von cli() bzw. Pipeline gesetzt, beim Import findet keinerlei I/O statt
+config: Dict[str, Any] = {}
 
+@functools.lru_cache(maxsize=None)
+def tool_exists(tool_path: str) -> bool:
+    """Prüft (einmal pro Pfad und Prozess), ob ein Tool-Executable vorhanden ist."""
+    return bool(tool_path) and os.path.exists(tool_path)
 
 # Prüfung ob die Tool-Executables erreichbar sind
-def verify_tool_paths():
+def verify_tool_paths(tools=None):
+    """Prüft alle (oder die angegebenen) Tools aus der Config und löst ToolNotFoundError aus, falls welche fehlen."""
     missing_tools = []
     
     for tool, data in config["tools"].items():
+        if tools is not None and tool not in tools:
+            continue
         tool_path: str = data["path"]
-        if not os.path.exists(tool_path):
+        if not tool_exists(tool_path):
             missing_tools.append(tool)
             print(f"[ERROR] Tool '{tool}' nicht gefunden: {tool_path}")
 
     if missing_tools:
         print("[ERROR] Die folgenden Tools fehlen oder die Pfade sind falsch:")
         print(", ".join(missing_tools))
-        sys.exit(1)  # Beenden, falls wichtige Tools fehlen
+        raise ToolNotFoundError(", ".join(missing_tools))
     else:
         print("[INFO] Alle benötigten Tools sind vorhanden.")
 
-verify_tool_paths()
-
 # CLI-Parameter verarbeiten
-def process_cli_args():
-    for arg in sys.argv[1:]:
+def process_cli_args(args=None):
+    for arg in (sys.argv[1:] if args is None else args):
         # Debug-Level
         if arg.startswith("debug=") or arg.startswith("d="):
             try:
@@ -117,6 +296,90 @@ def process_cli_args():
             except ValueError:
                 print("[ERROR] Collage muss eine Zahl sein (0 oder 1)")
 
+        # Parallele Optimierung
+        if arg.startswith("optimize_workers=") or arg.startswith("ow="):
+            try:
+                optimize_workers = int(arg.split("=")[1])
+                if optimize_workers >= 0:
+                    config['parameters']['optimize_workers'] = optimize_workers
+                    print(f"[INFO] Optimierungs-Worker auf {optimize_workers} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültige Anzahl an Optimierungs-Workern. Erlaubt: 0 (automatisch) oder größer")
+            except ValueError:
+                print("[ERROR] Optimierungs-Worker muss eine Zahl sein (0 = automatisch)")
+
+        # Parallele Batch-Jobs
+        if arg.startswith("batch_workers=") or arg.startswith("bw="):
+            try:
+                batch_workers = int(arg.split("=")[1])
+                if batch_workers >= 0:
+                    config['parameters']['batch_workers'] = batch_workers
+                    print(f"[INFO] Batch-Worker auf {batch_workers} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültige Anzahl an Batch-Workern. Erlaubt: 0 (automatisch) oder größer")
+            except ValueError:
+                print("[ERROR] Batch-Worker muss eine Zahl sein (0 = automatisch)")
+
+        # Inkrementeller Modus
+        if arg.startswith("incremental=") or arg.startswith("inc="):
+            try:
+                incremental = int(arg.split("=")[1])
+                if incremental in (0, 1, 2):
+                    config['parameters']['incremental'] = incremental
+                    print(f"[INFO] Inkrementeller Modus auf {incremental} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültiger inkrementeller Modus. Erlaubt: 0, 1, 2")
+            except ValueError:
+                print("[ERROR] Inkrementeller Modus muss eine Zahl sein (0, 1 oder 2)")
+
+        # Tracing
+        if arg.startswith("trace=") or arg.startswith("tr="):
+            try:
+                trace = int(arg.split("=")[1])
+                if trace in (0, 1):
+                    config['parameters']['trace'] = trace
+                    print(f"[INFO] Tracing auf {trace} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültiger Tracing-Wert. Erlaubt: 0, 1")
+            except ValueError:
+                print("[ERROR] Tracing muss eine Zahl sein (0 oder 1)")
+
+        # Stufen-Pipeline im Batchmodus
+        if arg.startswith("pipeline=") or arg.startswith("pl="):
+            try:
+                pipeline = int(arg.split("=")[1])
+                if pipeline in (0, 1):
+                    config.setdefault('pipeline', {})['active'] = pipeline
+                    print(f"[INFO] Stufen-Pipeline auf {pipeline} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültiger Wert für die Stufen-Pipeline. Erlaubt: 0, 1")
+            except ValueError:
+                print("[ERROR] Stufen-Pipeline muss eine Zahl sein (0 oder 1)")
+
+        # Wiederaufnahme abgebrochener Läufe
+        if arg.startswith("resume=") or arg.startswith("rs="):
+            try:
+                resume = int(arg.split("=")[1])
+                if resume in (0, 1):
+                    config['parameters']['resume'] = resume
+                    print(f"[INFO] Wiederaufnahme auf {resume} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültiger Wert für die Wiederaufnahme. Erlaubt: 0, 1")
+            except ValueError:
+                print("[ERROR] Wiederaufnahme muss eine Zahl sein (0 oder 1)")
+
+        # Dienst-Modus
+        if arg.startswith("daemon=") or arg.startswith("dm="):
+            try:
+                daemon_mode = int(arg.split("=")[1])
+                if daemon_mode in (0, 1):
+                    config.setdefault('daemon', {})['active'] = daemon_mode
+                    print(f"[INFO] Dienst-Modus auf {daemon_mode} gesetzt (override)")
+                else:
+                    print("[WARN] Ungültiger Dienst-Modus. Erlaubt: 0, 1")
+            except ValueError:
+                print("[ERROR] Dienst-Modus muss eine Zahl sein (0 oder 1)")
+
         # Input-Ordner
         if arg.startswith("i="):
             input_folder = os.path.abspath(arg.split("=")[1])
@@ -159,30 +422,23 @@ def process_cli_args():
             else:
                 print("[WARN] Ungültiger Log-Override. Erlaubte Werte: t (temp), i (input), o (output), d (default)")
 
-process_cli_args()
-
 ######################################################################## 
 ####                    LOGGING & DEBUGGING                         ####
 ######################################################################## 
 
-def log_message(message, log_level=1):
-    """Schreibt eine Lognachricht je nach gewähltem Log-Level."""
-    
-    # Log-Level-Filterung
-    if config['parameters']['loglevel'] == 0:
-        return
-    if config['parameters']['loglevel'] < log_level:
-        return
+def resolve_log_file():
+    """Bestimmt den Pfad der Log-Datei (einmal pro Lauf)."""
+    log_override = config['logging']['log_override']
 
-    # Speicherort bestimmen
-    if config['logging']['log_override'] == 't':
+    # Speicherort bestimmen (Kurzform aus der CLI oder ausgeschriebener Wert aus der Config)
+    if log_override in ('t', 'temp'):
         folder = config['paths']['temp_folder']
-    elif config['logging']['log_override'] == 'i':
+    elif log_override in ('i', 'input'):
         if config['parameters']['batch_mode'] == 0:
             folder = config['paths']['base_folder_single']
         else:
             folder = config['paths']['base_folder_batch']
-    elif config['logging']['log_override'] == 'o':
+    elif log_override in ('o', 'output'):
         folder = config['paths']['output_folder']
     else:
         folder = config['logging']['log_folder']
@@ -193,44 +449,207 @@ def log_message(message, log_level=1):
     else:
         log_file_name = f"ipt_{LOG_TIMESTAMP}.log"
 
-    # Log-Dateipfad erstellen
     os.makedirs(folder, exist_ok=True)
-    log_file = os.path.join(folder, log_file_name)
+    return os.path.join(folder, log_file_name)
+
+def open_log_file(log_file):
+    """Öffnet die Log-Datei zum Anhängen, bei Fehlern wird None zurückgegeben (der nächste Block versucht es erneut)."""
+    try:
+        return open(log_file, "a", encoding="utf-8")
+    except OSError as e:
+        print(f"[ERROR] Log-Datei konnte nicht geöffnet werden: {e}")
+        return None
+
+def rotate_log_file(log_file):
+    """Benennt eine zu große Log-Datei um. Der Name enthält einen Zähler, falls es ihn in derselben Sekunde schon gibt."""
+    base_name = f"{os.path.splitext(log_file)[0]}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    archive_name = f"{base_name}.log"
+    counter = 1
+    while os.path.exists(archive_name):
+        archive_name = f"{base_name}_{counter}.log"
+        counter += 1
+    os.rename(log_file, archive_name)
+    print(f"[INFO] Log-Datei zu '{archive_name}' umbenannt, da sie zu groß wurde.")
+
+def log_writer_loop(log_queue, log_file):
+    """Hintergrund-Thread: schreibt gebündelte Lognachrichten und rotiert die Datei nach Größe.
+
+    Nur der Hauptprozess rotiert: Worker-Prozesse schreiben in dieselbe Datei, und mehrere rotierende Prozesse
+    würden sich gegenseitig die Datei unter den offenen Handles wegbenennen. Fehler beenden den Thread nie,
+    sonst würde flush_log() auf Nachrichten warten, die niemand mehr schreibt.
+    """
+    may_rotate = multiprocessing.parent_process() is None
+    f = open_log_file(log_file)
+
+    running = True
+    while running:
+        lines = [log_queue.get()]
+        while len(lines) < LOG_BATCH_LINES:
+            try:
+                lines.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if None in lines:  # Stopp-Signal, vorherige Zeilen werden noch geschrieben
+            running = False
+        text = "".join(line for line in lines if line is not None)
+
+        try:
+            if f is None:
+                f = open_log_file(log_file)
+            if text and f is not None:
+                f.write(text)
+                f.flush()
+
+            # Log-Dateigröße überprüfen (tatsächliche Größe inklusive der Zeilen anderer Prozesse)
+            if may_rotate and f is not None and os.fstat(f.fileno()).st_size > MAX_LOG_SIZE:
+                f.close()
+                try:
+                    rotate_log_file(log_file)
+                finally:
+                    f = open_log_file(log_file)  # Auch nach gescheiterter Umbenennung weiterschreiben
+        except Exception as e:
+            print(f"[ERROR] Log-Datei konnte nicht geschrieben werden: {e}")
+        finally:
+            for _ in lines:
+                log_queue.task_done()
+
+    if f is not None:
+        f.close()
+
+def start_log_writer():
+    """Startet den Log-Writer für den aktuellen Prozess (auch nach fork in Worker-Prozessen)."""
+    with LOG_WRITER_LOCK:
+        if LOG_WRITER["pid"] == os.getpid() and LOG_WRITER["thread"] is not None:
+            return LOG_WRITER["queue"]
+
+        log_queue = queue.Queue()
+        log_file = resolve_log_file()
+        thread = threading.Thread(target=log_writer_loop, args=(log_queue, log_file), name="ipt-log-writer", daemon=True)
+        thread.start()
+        LOG_WRITER.update({"queue": log_queue, "thread": thread, "file": log_file, "pid": os.getpid()})
+        return log_queue
+
+def flush_log(timeout=LOG_FLUSH_TIMEOUT):
+    """Wartet, bis alle bisher übergebenen Lognachrichten geschrieben sind (höchstens timeout Sekunden).
+
+    Läuft der Log-Writer nicht mehr, wird nicht gewartet, damit Worker-Prozesse nie am Log hängen bleiben.
+    """
+    if LOG_WRITER["pid"] != os.getpid() or LOG_WRITER["queue"] is None:
+        return
+    log_queue, thread = LOG_WRITER["queue"], LOG_WRITER["thread"]
+    deadline = time.monotonic() + timeout
+    with log_queue.all_tasks_done:
+        while log_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or thread is None or not thread.is_alive():
+                print("[WARN] Nicht alle Lognachrichten konnten geschrieben werden.")
+                return
+            log_queue.all_tasks_done.wait(min(remaining, 0.5))
+
+def stop_log_writer():
+    """Schreibt alle ausstehenden Nachrichten und beendet den Log-Writer (z.B. beim Programmende)."""
+    with LOG_WRITER_LOCK:
+        if LOG_WRITER["pid"] != os.getpid() or LOG_WRITER["thread"] is None:
+            return
+        LOG_WRITER["queue"].put(None)
+        LOG_WRITER["thread"].join(LOG_FLUSH_TIMEOUT)
+        LOG_WRITER.update({"queue": None, "thread": None, "file": None, "pid": None})
+
+atexit.register(stop_log_writer)
+
+def log_message(message, log_level=1):
+    """Schreibt eine Lognachricht je nach gewähltem Log-Level (gepuffert über den Log-Writer)."""
     
+    # Log-Level-Filterung
+    if config['parameters']['loglevel'] == 0:
+        return
+    if config['parameters']['loglevel'] < log_level:
+        return
+
+    log_queue = LOG_WRITER["queue"] if LOG_WRITER["pid"] == os.getpid() else None
+    if log_queue is None:
+        log_queue = start_log_writer()
+
     # Zeitstempel generieren
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Log-Dateigröße überprüfen
-    MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB
-    if os.path.exists(log_file) and os.path.getsize(log_file) > MAX_LOG_SIZE:
-        archive_name = f"{os.path.splitext(log_file)[0]}_{datetime.now().strftime('%Y%m%d%H%M%S')}.log"
-        os.rename(log_file, archive_name)
-        print(f"[INFO] Log-Datei zu '{archive_name}' umbenannt, da sie zu groß wurde.")
-        
+
     # Log-Level Tag setzen
     log_levels = {0: "NONE", 1: "INFO", 2: "DEBUG"}
     level_tag = log_levels.get(log_level, "INFO")  # Standard ist INFO
 
-    # Log-Nachricht schreiben
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] [{level_tag}] {message}\n")
+    # Log-Kontext des Batch-Jobs, damit parallele Jobs im gemeinsamen Log unterscheidbar bleiben
+    job_tag = f"[{JOB_NAME}] " if JOB_NAME else ""
+
+    log_queue.put(f"[{timestamp}] [{level_tag}] {job_tag}{message}\n")
 
 def debug_log(message, level=1):
     if config['parameters'].get('debug', 0) >= level:
         print(f"[DEBUG] {message}")
 
+@contextlib.contextmanager
+def stage(name, resource="auto"):
+    """Misst die Laufzeit eines Verarbeitungsschritts, addiert sie in STAGE_TIMES und zeichnet einen Span auf.
+
+    Im Pipeline-Betrieb wird vorher ein Slot der Ressourcenklasse des Schritts belegt (resource=None = ohne Slot),
+    die Wartezeit zählt nicht zur Laufzeit des Schritts.
+    """
+    slot = PIPELINE["slots"].get(STAGE_RESOURCES.get(name) if resource == "auto" else resource)
+    if slot is not None:
+        with span(f"{name} (wartet)", "wait"):
+            slot.acquire()
+    start_time = time.perf_counter()
+    try:
+        with span(name, "stage") as args:
+            yield args
+    finally:
+        STAGE_TIMES[name] = STAGE_TIMES.get(name, 0.0) + time.perf_counter() - start_time
+        if slot is not None:
+            slot.release()
+
+def acquire_temp_space():
+    """Wartet im Pipeline-Betrieb, bis weniger als max_staged Ordner bereitgestellt auf die Optimierung warten."""
+    slot = PIPELINE["slots"].get("staged")
+    if slot is not None and not PIPELINE["holds_temp"]:
+        with span("staged (wartet)", "wait"):
+            slot.acquire()
+        PIPELINE["holds_temp"] = True
+
+def release_temp_space():
+    """Gibt den Platz des aktuellen Ordners in der Warteschlange vor der Optimierung frei."""
+    if PIPELINE["holds_temp"]:
+        PIPELINE["holds_temp"] = False
+        PIPELINE["slots"]["staged"].release()
+
 ######################################################################## 
 ####                         HAUPTPROGRAMM                          ####
 ######################################################################## 
 
 def process_images(base_folder, input_folder=None):
+    """Hauptverarbeitung für einen Basisordner, mit Schrittzeiten und (bei trace = 1) Trace-Aufzeichnung."""
+    STAGE_TIMES.clear()
+    # Die Temp-Pfade (001.jpg, collage_images/...) wiederholen sich je Ordner, der Index gilt daher nur für einen Ordner
+    with IMAGE_INFO_LOCK:
+        IMAGE_INFO_INDEX.clear()
+    start_trace()
+    try:
+        with span("process_images", "folder", folder=base_folder):
+            return process_images_core(base_folder, input_folder)
+    finally:
+        finish_trace(base_folder)
+
+def process_images_core(base_folder, input_folder=None):
     """Hauptverarbeitung für einen Basisordner."""
     
+    # Jeder Ordner wird genau einmal gelesen, Typ und stat-Daten kommen aus den Verzeichniseinträgen
+    base_listing = scan_folder(base_folder)
+
     # Einzelmodus - der Bilderordner ist bereits definiert
     if input_folder != None:
-        subfolder_images = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.lower().endswith(('.jpg', '.jpeg'))]
-        subfolder_files = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if os.path.isfile(os.path.join(input_folder, f))]
-        subfolder_subfolders = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if os.path.isdir(os.path.join(input_folder, f))]
+        subfolder_listing = scan_folder(input_folder)
+        subfolder_files = subfolder_listing["files"]
+        subfolder_images = [f for f in subfolder_files if f.lower().endswith(('.jpg', '.jpeg'))]
+        subfolder_subfolders = subfolder_listing["dirs"]
         num_subfolder_images = len(subfolder_images)  # Anzahl der gefundenen JPEG-Bilder im Unterordner
         image_subfolder = input_folder
         print(f"[INFO] Bildverarbeitung des Ordners {image_subfolder}\n")
@@ -238,11 +657,7 @@ def process_images(base_folder, input_folder=None):
     else:
     # Batchmodus - die Anzahl der Bilderordner ist nicht bekannt
     # Prüfung der Anzahl der Bilderordner
-        image_folders = []
-        for subfolder in os.listdir(base_folder):
-            image_folder_path = os.path.join(base_folder, subfolder)
-            if os.path.isdir(image_folder_path):  # Stellt sicher, dass nur Ordner verarbeitet werden
-                image_folders.append(image_folder_path)
+        image_folders = base_listing["dirs"]
         
         num_image_folders = len(image_folders)  # Anzahl der gefundenen Ordner
         
@@ -256,9 +671,10 @@ def process_images(base_folder, input_folder=None):
             return
         else:
             image_subfolder = image_folders[0]
-            subfolder_images = [os.path.join(image_subfolder, f) for f in os.listdir(image_subfolder) if f.lower().endswith(('.jpg', '.jpeg'))]
-            subfolder_files = [os.path.join(image_subfolder, f) for f in os.listdir(image_subfolder) if os.path.isfile(os.path.join(image_subfolder, f))]
-            subfolder_subfolders = [os.path.join(image_subfolder, f) for f in os.listdir(image_subfolder) if os.path.isdir(os.path.join(image_subfolder, f))]
+            subfolder_listing = scan_folder(image_subfolder)
+            subfolder_files = subfolder_listing["files"]
+            subfolder_images = [f for f in subfolder_files if f.lower().endswith(('.jpg', '.jpeg'))]
+            subfolder_subfolders = subfolder_listing["dirs"]
             num_subfolder_images = len(subfolder_images)  # Anzahl der gefundenen JPEG-Bilder im Unterordner
             print(f"[INFO] Bildverarbeitung des Ordners {image_subfolder}\n")
             log_message(f"Bildverarbeitung des Ordners {image_subfolder}\n")
@@ -279,9 +695,18 @@ def process_images(base_folder, input_folder=None):
     
     # Prüfen der Bilder zum Erstellen der Collage und des Single Images
 
-    image_files = find_image_files(base_folder)
+    image_files = find_image_files(base_folder, base_listing)
     num_images = len(image_files)  # Anzahl der gefundenen Collage-Bilder
 
+    # Ein einziger Header-Scan liefert Größe und Ausrichtung für Seitenverhältnis und automatische Auswahl
+    with stage("scan"):
+        scan_image_headers(image_files + subfolder_images)
+
+    # Quelldateien und Config-Profil für das Manifest festhalten, bevor die Ordnerlogik Parameter anpasst
+    manifest_sources = stat_source_files(image_files + subfolder_files,
+                                         {**base_listing["entries"], **subfolder_listing["entries"]})
+    config_profile = get_config_fingerprint()
+
     # Debug/Log-Ausgabe der Bildanzahl
     debug_log(f"[INFO] Gefundene Collage-Bilder: {num_images}", 2)
     log_message(f"Gefundene Collage-Bilder: {num_images}", 2)
@@ -305,7 +730,7 @@ def process_images(base_folder, input_folder=None):
                 debug_log("Keine Collage-Bilder vorhanden, versuche automatische Auswahl...", 2)
                 log_message("Keine Collage-Bilder vorhanden, versuche automatische Auswahl...", 2)
                 if num_subfolder_images >= 4:
-                    image_files = auto_select_images(subfolder_images, target_aspect)  # Automatische Auswahl durchführen
+                    image_files = auto_select_images(sorted(subfolder_images), target_aspect)  # Automatische Auswahl durchführen
                     if len(image_files) == 4:
                         if config['parameters']['collage'] == 1:
                             log_message("Vier Collage-Bilder ausgewählt.")
@@ -324,7 +749,7 @@ def process_images(base_folder, input_folder=None):
                         config['parameters']['single_image'] = 0
                         config['parameters']['collage'] = 0
                 elif num_subfolder_images >= 1:
-                    image_files = auto_select_images(subfolder_images, target_aspect)  # Automatische Auswahl durchführen
+                    image_files = auto_select_images(sorted(subfolder_images), target_aspect)  # Automatische Auswahl durchführen
                     if len(image_files) >= 1:
                         print("Es wird nur das Cover-Bild erstellt.")
                         log_message("Es wird nur das Cover-Bild erstellt.")
@@ -345,7 +770,7 @@ def process_images(base_folder, input_folder=None):
                 config['parameters']['single_image'] = 0
                 config['parameters']['collage'] = 0
         else:  # Falls nur 1-3 Bilder vorhanden sind
-            subfolder_images2 = list(subfolder_images)
+            subfolder_images2 = sorted(subfolder_images)  # Das vorhandene 001 ersetzt die erste Seite
             subfolder_images2[0] = image_files[0]
             if config['parameters']['abort_incomplete_001_004'] == 1:
                 print(f"[ERROR] Nur {num_images} von 4 Collage-Bildern gefunden! Skript bricht ab.")
@@ -406,6 +831,9 @@ def process_images(base_folder, input_folder=None):
            (output_abs_path, temp_abs_path)
        ]):
            temp_folder = get_safe_temp_folder(base_folder, config['paths']['output_folder'])
+           # Parallele Batch-Jobs dürfen sich den alternativen Temp-Ordner nicht teilen
+           if JOB_NAME:
+               temp_folder = os.path.join(temp_folder, get_job_temp_name(base_folder))
     else:
         temp_folder = config['paths']['temp_folder']
 
@@ -414,85 +842,173 @@ def process_images(base_folder, input_folder=None):
         log_message(f"[WARN] Es wurden {len(subfolder_subfolders)} Unterordner gefunden, diese werden ignoriert!")
 
     image_subfolder_basename = os.path.basename(image_subfolder)
-
-    # Kopieren der Dateien in die temporären Ordner
-    copy_images(image_files, temp_folder)
-    log_message(f"Kopieren von {len(image_files)} Dateien in den Ordner {os.path.basename(temp_folder)}.", 2)
     temp_subfolder = os.path.join(temp_folder, image_subfolder_basename)
-    copy_images(subfolder_files, temp_subfolder)
-    log_message(f"Kopieren von {len(subfolder_files)} Dateien in den Ordner {os.path.basename(temp_subfolder)}.", 2)
+
+    # Bei resume = 1 werden abgeschlossene Schritte eines abgebrochenen Laufs aus dem Journal übernommen
+    journal = open_journal(temp_folder, image_subfolder, manifest_sources, config_profile)
+
+    # Bereitstellen der Dateien in den temporären Ordnern, nur von Tools überschriebene JPEGs werden echt kopiert
+    acquire_temp_space()
+    staged_files = {}
+    if get_step(journal, "staged"):
+        log_message(f"[INFO] Bereitstellung aus dem Journal übernommen ({temp_folder}).")
+    else:
+        restart_journal(journal)  # Neu bereitgestellte Dateien machen alle späteren Schritte ungültig
+        with stage("copy"):
+            stage_files(image_files, temp_folder)
+            log_message(f"Kopieren von {len(image_files)} Dateien in den Ordner {os.path.basename(temp_folder)}.", 2)
+            staged_files = stage_files(subfolder_files, temp_subfolder, rewrite_extensions=('.jpg', '.jpeg'))
+        log_message(f"Kopieren von {len(subfolder_files)} Dateien in den Ordner {os.path.basename(temp_subfolder)}.", 2)
+        record_step(journal, "staged", files=[os.path.join(temp_folder, os.path.basename(f)) for f in image_files]
+                    + [os.path.join(temp_subfolder, os.path.basename(f)) for f in subfolder_files])
+    known_digests = {src: staged_files[os.path.join(temp_subfolder, os.path.basename(src))][1]
+                     for src in subfolder_files if os.path.join(temp_subfolder, os.path.basename(src)) in staged_files}
     
     # Auflisten der Dateien zur Weiterverarbeitung
     collage_temp_images = find_image_files(temp_folder)
     log_message(f"{len(collage_temp_images)} Dateien im Ordner {os.path.basename(temp_folder)} gefunden.", 2)
-    temp_subfolder_images = [os.path.join(temp_subfolder, f) for f in os.listdir(temp_subfolder) if f.lower().endswith(('.jpg', '.jpeg'))]
+    temp_subfolder_files = scan_folder(temp_subfolder)["files"]
+    temp_subfolder_images = [f for f in temp_subfolder_files if f.lower().endswith(('.jpg', '.jpeg'))]
     log_message(f"{len(temp_subfolder_images)} JPEG-Bilder im Ordner {os.path.basename(temp_subfolder)} gefunden.", 2)
-    temp_subfolder_files = [os.path.join(temp_subfolder, f) for f in os.listdir(temp_subfolder) if os.path.isfile(os.path.join(temp_subfolder, f))]
     log_message(f"Insgesamt {len(temp_subfolder_files)} Dateien im Ordner {os.path.basename(temp_subfolder)} gefunden.", 2)
 
-    # Überprüfung der Datei-Integrität
-    verify_file_integrity(subfolder_files, temp_subfolder_files)
+    # Überprüfung der Datei-Integrität (nach der Optimierung wären die Kopien nicht mehr vergleichbar)
+    verified = get_step(journal, "verified")
+    if verified:
+        source_hashes = verified["hashes"]
+    else:
+        with stage("integrity"):
+            source_hashes = verify_file_integrity(subfolder_files, temp_subfolder_files, known_digests)
+        record_step(journal, "verified", hashes=source_hashes)
 
     # Ermitteln des Seitenverhältnisses der Bilder Single Image und Collage (Breite-zu-Höhe)
     meta_images = []
+    rendered = get_step(journal, "rendered")
     if config['parameters']['single_image'] == 0 and config['parameters']['collage'] == 0:
         pass
+    elif rendered:
+        meta_images = rendered["files"]
+        log_message(f"[INFO] Single Image und Collage aus dem Journal übernommen: {meta_images}", 2)
     else:
         target_width, target_height = get_target_aspect(collage_temp_images, temp_subfolder_images)
             
         debug_log(f"Die Coverbilder werden mit {target_width}px weit und {target_height}px hoch erstellt.", 2)
         log_message(f"Die Coverbilder werden mit {target_width}px weit und {target_height}px hoch erstellt.", 2)
         
-        # Single Image erstellen
+        # Pfade für Single Image und Collage bestimmen
+        single_image_path = None
+        collage_path = None
         if config['parameters']['single_image'] == 1 and collage_temp_images:
             if config['parameters']['collage'] == 0:
                 single_image_path = os.path.join(os.path.dirname(collage_temp_images[0]), image_subfolder_basename) + '.jpg'
             else:
                 single_image_path = os.path.join(os.path.dirname(collage_temp_images[0]), image_subfolder_basename) + ' cover.jpg'
-                
-            resize_and_pad_image(collage_temp_images[0], target_width, target_height, single_image_path)
-            debug_log("Das Cover-Image wurde erstellt.", 2)
-            log_message("Das Cover-Image wurde erstellt.", 2)
-            meta_images.append(single_image_path)
         
-        # Collage erstellen
         if config['parameters']['collage'] == 1 and len(collage_temp_images) == 4:
             if config['parameters']['single_image'] == 0:
                 collage_path = os.path.join(os.path.dirname(collage_temp_images[0]), image_subfolder_basename) + '.jpg'
             else:
                 collage_path = os.path.join(os.path.dirname(collage_temp_images[0]), image_subfolder_basename) + ' cs.jpg'
-                
-            create_collage(collage_temp_images, target_width, target_height, collage_path)
-            debug_log("Die Collage wurde erstellt.", 2)
-            log_message("Die Collage wurde erstellt.", 2)
-            meta_images.append(collage_path)
+
+        # Single Image und Collage in einem Aufruf erstellen, jedes Quellbild wird nur einmal dekodiert
+        with stage("render"):
+            meta_images = render_meta_images(collage_temp_images, target_width, target_height, single_image_path, collage_path)
     
-        optimize_images(meta_images, "single_collage_images")
-        copy_images(meta_images, config['paths']['output_folder'])
+        with stage("optimize", resource=None):  # Die Coverbilder warten nicht auf die Optimierung anderer Ordner
+            optimize_images(meta_images, "single_collage_images")
+        with stage("move"):
+            copy_images(meta_images, config['paths']['output_folder'])
+        record_step(journal, "rendered", files=meta_images)
         
-    temp_subfolder_images = validate_jpeg_files(temp_subfolder_images)
-    
-    optimize_images(temp_subfolder_images, "folder_images")
+    # Die Kopien sind zu diesem Zeitpunkt identisch mit den Originalen, deren Hashes dienen als Cache-Schlüssel
+    validated = get_step(journal, "validated")
+    if validated:
+        temp_subfolder_images = validated["files"]
+    else:
+        temp_digests = {os.path.join(temp_subfolder, os.path.basename(src)): digest for src, digest in source_hashes.items()}
+        with stage("validate"):
+            temp_subfolder_images = validate_jpeg_files(temp_subfolder_images, temp_digests)
+        record_step(journal, "validated", files=temp_subfolder_images)
+
+    # Bereits optimierte Bilder eines abgebrochenen Laufs bleiben, angefangene werden neu aus dem Original bereitgestellt
+    pending_images = [img for img in temp_subfolder_images if os.path.basename(img) not in journal["optimized"]]
+    if validated:
+        print(f"[INFO] {len(temp_subfolder_images) - len(pending_images)} Bilder bereits optimiert (Journal), {len(pending_images)} verbleiben.")
+        log_message(f"[INFO] {len(temp_subfolder_images) - len(pending_images)} Bilder bereits optimiert (Journal), {len(pending_images)} verbleiben.")
+        with stage("copy"):
+            stage_files([os.path.join(image_subfolder, os.path.basename(img)) for img in pending_images], temp_subfolder,
+                        rewrite_extensions=('.jpg', '.jpeg'))
+
+    with stage("optimize"):
+        release_temp_space()  # Sobald der Ordner optimiert wird, darf der nächste bereitgestellt werden
+        optimize_images(pending_images, "folder_images",
+                        done_callback=lambda img: record_step(journal, "optimized", sync=False, image=os.path.basename(img)))
 
     archive_objects = meta_images.copy()
     archive_objects.append(image_subfolder)
 
-    create_best_archive(image_subfolder_basename, archive_objects)
-    
-    clear_temp_folder()
+    # Erstellen und Verschieben des Archivs sind getrennte Schritte, damit ein fertiges Test-Archiv erhalten bleibt
+    archived = get_step(journal, "archived")
+    if archived:
+        best_archive, archive_candidates = archived["files"][0], archived["candidates"]
+    else:
+        best_archive, archive_candidates = build_best_archive(image_subfolder_basename, archive_objects)
+        if best_archive:
+            record_step(journal, "archived", files=[best_archive], candidates=archive_candidates)
+
+    final_archive = None
+    moved = get_step(journal, "moved")
+    if moved:
+        final_archive = moved["files"][0]
+    elif best_archive:
+        final_archive = move_best_archive(image_subfolder_basename, best_archive, archive_candidates)
+
+    if final_archive and os.path.exists(final_archive):
+        record_step(journal, "moved", files=[final_archive])
+        write_manifest(base_folder, image_subfolder, final_archive, manifest_sources, config_profile, source_hashes)
+        close_journal(journal)
+
+    log_tool_summary()
+
+    # Ohne fertiges Archiv bleibt der Temp-Ordner bei resume = 1 für die Wiederaufnahme erhalten
+    if (final_archive and os.path.exists(final_archive)) or not journal["enabled"]:
+        clear_temp_folder()
+
+    return final_archive
     
-def find_image_files(base_folder):
-    """Sucht nach vier Bildern mit erlaubten Endungen."""
-    candidates = ["001", "002", "003", "004"]
-    extensions = ['.jpg', '.jpeg', '.png']
+def scan_folder(folder):
+    """Liest einen Ordner in einem einzigen os.scandir-Durchlauf.
+
+    Gibt {"files": [...], "dirs": [...], "entries": {Pfad: DirEntry}} zurück. Der Typ stammt aus dem
+    Verzeichniseintrag (ohne eigenen stat-Aufruf), DirEntry.stat() wird beim ersten Aufruf zwischengespeichert.
+    """
+    listing = {"files": [], "dirs": [], "entries": {}}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            listing["entries"][entry.path] = entry
+            if entry.is_file():
+                listing["files"].append(entry.path)
+            elif entry.is_dir():
+                listing["dirs"].append(entry.path)
+    return listing
+
+def iter_batch_folders(input_folder):
+    """Liefert die Unterordner eines Batch-Ordners, sobald der os.scandir-Durchlauf sie findet."""
+    with os.scandir(input_folder) as entries:
+        for entry in entries:
+            if entry.is_dir():  # Stellt sicher, dass nur Ordner verarbeitet werden
+                yield entry.path
+
+def find_image_files(base_folder, listing=None):
+    """Sucht nach vier Bildern mit erlaubten Endungen (in einer vorhandenen Ordnerliste oder per scandir)."""
     image_paths = []
+    files = {os.path.basename(path): path for path in (listing or scan_folder(base_folder))["files"]}
 
-    for base in candidates:
+    for base in COLLAGE_CANDIDATES:
         found = False
-        for ext in extensions:
-            path = os.path.join(base_folder, base + ext)
-            if os.path.exists(path):
-                image_paths.append(path)
+        for ext in COLLAGE_EXTENSIONS:
+            if base + ext in files:
+                image_paths.append(files[base + ext])
                 found = True
                 break
         if not found:
@@ -502,11 +1018,10 @@ def find_image_files(base_folder):
 
 def get_image_orientation(image_path: str) -> str:
     """
-    Bestimmt die Ausrichtung eines Bildes (Hoch- oder Querformat).
+    Bestimmt die Ausrichtung eines Bildes (Hoch- oder Querformat) aus dem Metadaten-Index.
     """
     
-    with Image.open(image_path) as img:
-        width, height = img.size
+    width, height, _ = get_image_info(image_path)
     
     return "portrait" if height >= width else "landscape"
 
@@ -552,66 +1067,139 @@ def get_target_aspect(collage_images: List[str], subfolder_images: List[str]) ->
     
     return target_width, target_height
 
-def auto_select_images(subfolder_images: List[str], target_aspect: Tuple[int, int]) -> List[str]:
+def score_collage_candidate(image_path):
+    """Misst Schärfe und Belichtung eines Bildes an einer reduzierten Dekodierung (höchstens SELECTION_SIZE Pixel Kantenlänge).
+
+    JPEGs werden per DCT-Skalierung direkt klein und in Graustufen dekodiert. Gibt {"sharpness": Varianz des
+    Laplace-Filters, "exposure": 0-1} zurück, bei nicht lesbaren Bildern None.
     """
-    Wählt 4 Bilder aus der gegebenen Liste subfolder_images nach den festgelegten Regeln aus.
+    try:
+        with Image.open(image_path) as img:
+            if img.format == "JPEG":
+                img.draft("L", (SELECTION_SIZE, SELECTION_SIZE))
+            gray = img.convert("L")
+        gray.thumbnail((SELECTION_SIZE, SELECTION_SIZE), Image.BILINEAR)  # Gleiche Größe, damit die Varianzen vergleichbar sind
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        log_message(f"[WARN] Bild konnte für die Auswahl nicht gelesen werden: {os.path.basename(image_path)} ({e})")
+        return None
+
+    if load_numpy() is None:
+        sharpness = ImageStat.Stat(gray.filter(ImageFilter.Kernel((3, 3), (0, 1, 0, 1, -4, 1, 0, 1, 0), 1, 128))).var[0]
+        histogram = gray.histogram()
+        mean = ImageStat.Stat(gray).mean[0]
+        clipped = (sum(histogram[:8]) + sum(histogram[248:])) / max(1, gray.width * gray.height)
+    else:
+        arr = np.asarray(gray, dtype=np.float32)
+        laplacian = arr[1:-1, :-2] + arr[1:-1, 2:] + arr[:-2, 1:-1] + arr[2:, 1:-1] - 4 * arr[1:-1, 1:-1]
+        sharpness = float(laplacian.var()) if laplacian.size else 0.0
+        mean = float(arr.mean())
+        clipped = float(((arr < 8) | (arr > 247)).mean())
+
+    # Mittlere Helligkeit nahe Mittelgrau und wenig ausgefressene oder abgesoffene Bereiche ergeben eine hohe Bewertung
+    exposure = max(0.0, 1.0 - abs(mean - 128.0) / 128.0 - clipped)
+    return {"sharpness": sharpness, "exposure": exposure}
+
+def score_collage_candidates(image_list):
+    """Bewertet alle Kandidaten parallel (Pfad → Messwerte).
+
+    Bei aktivem Cache werden Ergebnisse je Pfad, Größe und Änderungszeit wiederverwendet. Ein Datei-Hash würde
+    jeden Kandidaten vorab komplett lesen und die Auswahl um einen vollen Durchlauf über den Ordner verlängern.
     """
+    if not image_list:
+        return {}
+
+    cache_keys = {}
+    if get_cache_folder():
+        load_result_cache(SELECTION_CACHE, SELECTION_CACHE_LOCK, SELECTION_CACHE_FILE)
+        for path, (size, mtime_ns) in stat_source_files(image_list).items():
+            cache_keys[path] = f"{os.path.abspath(path)}:{size}:{mtime_ns}:{SELECTION_SIZE}"
+
+    def score(image_path):
+        cache_key = cache_keys.get(image_path)
+        with SELECTION_CACHE_LOCK:
+            cached = SELECTION_CACHE.get(cache_key) if cache_key else None
+        if cached:
+            return cached
+        result = score_collage_candidate(image_path)
+        if result and cache_key:
+            with SELECTION_CACHE_LOCK:
+                SELECTION_CACHE[cache_key] = result
+        return result
+
+    workers = min(get_worker_count('optimize_workers'), len(image_list))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scores = dict(zip(image_list, executor.map(score, image_list)))
+
+    if cache_keys:
+        save_result_cache(SELECTION_CACHE, SELECTION_CACHE_LOCK, SELECTION_CACHE_FILE)
+    return scores
+
+def select_collage_images(subfolder_images: List[str], target_aspect: Tuple[int, int]) -> List[str]:
+    """Bewertet die Kandidaten und wählt das erste Bild plus das beste Bild je Abschnitt (mindestens 4 Bilder)."""
     num_images: int = len(subfolder_images)
-    
-    if num_images < 4:
-        raise ValueError("Mindestens 4 Bilder erforderlich, um eine Collage zu erstellen!")
-    
+
     # Zielausrichtung bestimmen (portrait = Hochformat, landscape = Querformat)
     target_orientation: str = "portrait" if target_aspect[1] >= target_aspect[0] else "landscape"
     
-	# Fixe Positionen basierend auf der 0.3 / 0.6 / 0.9 Regel
-    pos_001: int = 0
-    pos_002: int = round(0.3 * num_images)
-    pos_003: int = round(0.6 * num_images)
-    pos_004: int = round(0.9 * num_images)
+    # Zielpositionen nach der 0.3 / 0.6 / 0.9 Regel und Abschnittsgrenzen, die auch bei kurzen Ordnern je ein Bild enthalten
+    positions = [round(0.3 * num_images), round(0.6 * num_images), min(round(0.9 * num_images), num_images - 1)]
+    bound_1 = min(max(2, round(0.45 * num_images)), num_images - 2)
+    bound_2 = min(max(bound_1 + 1, round(0.75 * num_images)), num_images - 1)
+    sections = [(1, bound_1), (bound_1, bound_2), (bound_2, num_images)]
+
+    weights = dict(SELECTION_WEIGHTS)
+    weights.update(config['parameters'].get('auto_select_weights', {}))
+    with stage("select"):
+        scores = score_collage_candidates(subfolder_images[1:])
     
     # Bild 001 bleibt immer das erste Bild
-    selected_images: List[str] = [subfolder_images[pos_001]]
-    
-    def find_best_fit(start_idx: int, valid_range: Tuple[int, int]) -> str:
-        """Sucht das nächste Bild mit der gleichen Ausrichtung wie das Ziel."""
-        min_idx, max_idx = valid_range
-        
-        if start_idx < min_idx or start_idx > max_idx:
-            raise ValueError("Startindex liegt außerhalb des gültigen Bereichs!")
-        
-        base_idx: int = start_idx
-        step: int = 1
-        direction: int = 1
-        
-        while min_idx <= base_idx <= max_idx:
-            candidate: str = subfolder_images[base_idx]
-            if get_image_orientation(candidate) == target_orientation:
-                return candidate
-            
-            # Umschalten zwischen +step und -step für die Suchrichtung
-            base_idx += step * direction
-            direction *= -1
-            step += 1
-        
-        return subfolder_images[start_idx]  # Falls nichts gefunden wird, bleibt die Originalwahl
-    
-    # Bild 002 finden
-    valid_range_002 = (1, pos_003 - 1)
-    selected_002 = find_best_fit(pos_002, valid_range_002)
-    selected_images.append(selected_002)
-    
-    # Bild 003 finden (muss nach 002 liegen)
-    min_003 = max(32, subfolder_images.index(selected_002))
-    valid_range_003 = (min_003, pos_004 - 1)
-    selected_003 = find_best_fit(pos_003, valid_range_003)
-    selected_images.append(selected_003)
+    selected_images: List[str] = [subfolder_images[0]]
     
-    # Bild 004 finden (muss nach 003 liegen)
-    min_004 = max(61, subfolder_images.index(selected_003))
-    valid_range_004 = (min_004, num_images - 1)
-    selected_004 = find_best_fit(pos_004, valid_range_004)
-    selected_images.append(selected_004)
+    for (start_idx, end_idx), position in zip(sections, positions):
+        position = min(max(position, start_idx), end_idx - 1)
+        candidates = [idx for idx in range(start_idx, end_idx) if scores.get(subfolder_images[idx])]
+        if not candidates:
+            selected_images.append(subfolder_images[position])  # Falls nichts lesbar ist, bleibt die Position
+            continue
+
+        # Schärfe logarithmisch und relativ zum schärfsten Bild des Abschnitts, damit die Motive vergleichbar bleiben
+        max_sharpness = max(math.log1p(scores[subfolder_images[idx]]["sharpness"]) for idx in candidates) or 1.0
+        section_length = max(1, end_idx - start_idx)
+
+        def total_score(idx):
+            image_path = subfolder_images[idx]
+            return (weights["orientation"] * (get_image_orientation(image_path) == target_orientation)
+                    + weights["sharpness"] * math.log1p(scores[image_path]["sharpness"]) / max_sharpness
+                    + weights["exposure"] * scores[image_path]["exposure"]
+                    + weights["position"] * (1.0 - abs(idx - position) / section_length))
+
+        best_idx = max(candidates, key=total_score)
+        log_message(f"Auswahl aus {os.path.basename(subfolder_images[start_idx])}-{os.path.basename(subfolder_images[end_idx - 1])}: "
+                    f"{os.path.basename(subfolder_images[best_idx])} (Bewertung {total_score(best_idx):.2f})", 2)
+        selected_images.append(subfolder_images[best_idx])
+
+    return selected_images
+
+def auto_select_images(subfolder_images: List[str], target_aspect: Tuple[int, int]) -> List[str]:
+    """
+    Wählt 4 Bilder aus der gegebenen Liste subfolder_images aus.
+
+    Bild 001 ist immer das erste Element der Liste (z.B. ein vorhandenes 001, das der Aufrufer dort einsetzt).
+    Für 002, 003 und 004 wird der Ordner in drei aufeinanderfolgende Abschnitte um 30 %, 60 % und 90 % geteilt
+    und aus jedem das Bild mit der besten Bewertung aus Ausrichtung, Schärfe, Belichtung und Nähe zur Zielposition
+    gewählt. Bei weniger als 4 Bildern werden die vorhandenen übernommen (nur für das Cover-Bild).
+    """
+    if not subfolder_images:
+        return []
+
+    # Die Verzeichnisliste hat keine feste Reihenfolge, das erste Element bleibt aber an seiner Stelle
+    subfolder_images = [subfolder_images[0]] + sorted(subfolder_images[1:])
+    num_images: int = len(subfolder_images)
+
+    if num_images < 4:
+        selected_images = subfolder_images
+    else:
+        selected_images = select_collage_images(subfolder_images, target_aspect)
 
     # Neuer spezieller Unterordner für die Collage-Bilder im temporären Verzeichnis
     collage_temp_folder = os.path.join(config['paths']['temp_folder'], "collage_images")
@@ -619,7 +1207,7 @@ def auto_select_images(subfolder_images: List[str], target_aspect: Tuple[int, in
 
     # Pfade der neuen Dateien mit Namen 001.jpg bis 004.jpg
     new_image_paths = [
-        os.path.join(collage_temp_folder, f"{i:03}.jpg") for i in range(1, 5)
+        os.path.join(collage_temp_folder, f"{i:03}.jpg") for i in range(1, len(selected_images) + 1)
     ]
 
     # Kopieren und Umbenennen der ausgewählten Bilder
@@ -628,9 +1216,9 @@ def auto_select_images(subfolder_images: List[str], target_aspect: Tuple[int, in
 
     # Nur Dateinamen extrahieren für Logging
     filenames = [os.path.basename(img) for img in selected_images]
-    formatted_files = f"{filenames[0]}, {filenames[1]}, {filenames[2]} und {filenames[3]}"
+    formatted_files = f"{', '.join(filenames[:-1])} und {filenames[-1]}" if len(filenames) > 1 else filenames[0]
     
-    parent_folder = os.path.basename(os.path.dirname(selected_images[0]))
+    parent_folder = os.path.basename(os.path.dirname(selected_images[-1]))
     
     print(f"[INFO] Automatisch gewählte Bilder: {formatted_files} aus dem Ordner {parent_folder}")
     log_message(f"Automatisch gewählte Bilder: {formatted_files} aus dem Ordner {parent_folder}")
@@ -684,34 +1272,159 @@ def copy_images(file_list, target_folder):
     print(f"[INFO] {len(file_list)} Dateien nach {target_folder} kopiert.")
     log_message(f"{len(file_list)} Dateien nach {target_folder} kopiert.")
 
-def file_hash(file_path):
-    """Berechnet den SHA256-Hash einer Datei mit dynamischer Chunk-Größe."""
-    hasher = hashlib.sha256()
-    extensions = ['.jpg', '.jpeg', '.png']
-    
-    # Bestimme die optimale Chunk-Größe
-    file_size = os.path.getsize(file_path)
-    
-    if file_path.lower().endswith(tuple(extensions)):
-        chunk_size = 4096  # 4 KB für Bilder
-    elif file_size > 4 * 1024 * 1024 * 1024:  # > 4 GB
-        chunk_size = 1048576  # 1 MB
-    elif file_size > 1024 * 1024 * 1024:  # > 1 GB
-        chunk_size = 262144  # 256 KB
+def clone_file(src, dst):
+    """Erstellt einen Copy-on-Write-Klon (FICLONE), die Daten werden dabei nicht gelesen."""
+    if fcntl is None:
+        raise OSError("FICLONE wird auf diesem System nicht unterstützt")
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+    shutil.copystat(src, dst)
+
+def copy_file_range_full(src, dst):
+    """Kopiert eine Datei im Kernel (copy_file_range), ohne die Daten durch den Userspace zu schleusen."""
+    if not hasattr(os, "copy_file_range"):
+        raise OSError("copy_file_range wird auf diesem System nicht unterstützt")
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+    shutil.copystat(src, dst)
+
+def stage_file(src, dst, rewritten):
+    """Stellt eine Datei im Temp-Ordner bereit und liefert (Strategie, Hash der Quelle oder None) zurück.
+
+    Dateien, die nur gelesen werden, werden als Hardlink eingebunden. Dateien, die ein Tool überschreibt,
+    brauchen eine eigenständige Kopie: bevorzugt als Reflink-Klon, sonst per copy_file_range, sonst copy2.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)  # Hardlinks und Klone können nicht über bestehende Dateien geschrieben werden
+
+    if config['parameters'].get('staging_mode', 'auto') == 'copy':
+        strategies = []
+    elif rewritten:
+        strategies = [("reflink", clone_file), ("copy_file_range", copy_file_range_full)]
     else:
-        chunk_size = 65536  # 64 KB Standard
-    
+        strategies = [("hardlink", os.link), ("reflink", clone_file), ("copy_file_range", copy_file_range_full)]
+
+    device = os.stat(os.path.dirname(dst)).st_dev
+    for name, function in strategies:
+        if (name, device) in STAGING_UNSUPPORTED:
+            continue
+        try:
+            function(src, dst)
+            return name, None
+        except OSError as e:
+            STAGING_UNSUPPORTED.add((name, device))
+            log_message(f"[DEBUG] Staging-Strategie '{name}' nicht verfügbar für {os.path.dirname(dst)}: {e}", 2)
+
+    # Volle Kopie: der Hash der Quelle entsteht beim Kopieren und spart das erneute Lesen in der Prüfung
+    return "copy", copy_with_digest(src, dst)
+
+def stage_files(file_list, target_folder, rewrite_extensions=()):
+    """Stellt eine Liste von Dateien in einem Ziel-Ordner bereit und protokolliert die Strategie je Datei.
+
+    Gibt ein Dictionary Zielpfad → (Strategie, Hash der Quelle oder None) zurück.
+    """
+
+    os.makedirs(target_folder, exist_ok=True)  # Sicherstellen, dass der Temp-Ordner existiert
+
+    strategies = {}
+    for file in file_list:
+        if os.path.exists(file):  # Sicherheitscheck, ob die Datei existiert
+            dst = os.path.join(target_folder, os.path.basename(file))
+            rewritten = file.lower().endswith(tuple(rewrite_extensions))
+            strategies[dst] = stage_file(file, dst, rewritten)
+            log_message(f"Bereitgestellt ({strategies[dst][0]}): {file} → {dst}", 2)
+        else:
+            log_message(f"[WARN] Datei nicht gefunden und wurde nicht kopiert: {file}")
+
+    counts = {}
+    for strategy, _ in strategies.values():
+        counts[strategy] = counts.get(strategy, 0) + 1
+    summary = ", ".join(f"{count}x {strategy}" for strategy, count in sorted(counts.items())) or "keine"
+
+    print(f"[INFO] {len(file_list)} Dateien nach {target_folder} bereitgestellt ({summary}).")
+    log_message(f"{len(file_list)} Dateien nach {target_folder} bereitgestellt ({summary}).")
+
+    return strategies
+
+def get_integrity_digest():
+    """Name des Hash-Verfahrens für die Integritätsprüfung (z.B. sha256 oder blake2b)."""
+    digest = config['parameters'].get('integrity_digest', 'sha256')
+    if digest not in hashlib.algorithms_available:
+        log_message(f"[WARN] Unbekanntes Hash-Verfahren '{digest}', nutze sha256.")
+        return 'sha256'
+    return digest
+
+def digest_file(file_path, algorithm=None):
+    """Berechnet den Hash einer Datei mit großen Puffern bzw. mmap. Liefert None, falls die Datei nicht lesbar ist."""
+    hasher = hashlib.new(algorithm or get_integrity_digest())
+
     try:
         with open(file_path, "rb") as f:
-            while chunk := f.read(chunk_size):
-                hasher.update(chunk)
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size >= MMAP_THRESHOLD:
+                # hashlib gibt bei großen Blöcken den GIL frei, mmap erspart das Kopieren in Python-Puffer
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            else:
+                buffer = bytearray(INTEGRITY_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while size := f.readinto(buffer):
+                    hasher.update(view[:size])
         return hasher.hexdigest()
     except Exception as e:
         log_message(f"[ERROR] Fehler beim Lesen der Datei {file_path}: {e}")
         return None  # Falls Datei nicht lesbar ist
 
-def verify_file_integrity(source_files, target_files):
-    """Vergleicht Original- und Kopien inhaltlich und meldet fehlende oder defekte Dateien."""
+def file_hash(file_path):
+    """Berechnet den SHA256-Hash einer Datei (z.B. für Cache-Schlüssel)."""
+    return digest_file(file_path, "sha256")
+
+def copy_with_digest(src, dst, algorithm=None):
+    """Kopiert eine Datei und berechnet dabei in einem Durchgang den Hash der gelesenen Daten."""
+    hasher = hashlib.new(algorithm or get_integrity_digest())
+    buffer = bytearray(INTEGRITY_CHUNK_SIZE)
+    view = memoryview(buffer)
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        while size := fsrc.readinto(buffer):
+            hasher.update(view[:size])
+            fdst.write(view[:size])
+
+    shutil.copystat(src, dst)  # Metadaten erhalten
+    return hasher.hexdigest()
+
+def digest_files(file_list, algorithm=None):
+    """Hasht viele Dateien gleichzeitig in einem Thread-Pool (Pfad → Hash)."""
+    algorithm = algorithm or get_integrity_digest()
+    if not file_list:
+        return {}
+
+    workers = min(get_worker_count('integrity_workers'), len(file_list))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(file_list, executor.map(lambda path: digest_file(path, algorithm), file_list)))
+
+def verify_file_integrity(source_files, target_files, known_digests=None):
+    """Vergleicht Original- und Kopien inhaltlich und meldet fehlende oder defekte Dateien.
+
+    Bereits beim Kopieren ermittelte Hashes der Originale können über known_digests übergeben werden.
+    Gibt die Hashes der Originale zurück (Pfad → Hash), damit sie weiterverwendet werden können.
+    """
+    known_digests = {path: digest for path, digest in (known_digests or {}).items() if digest}
     
     # Set-Vergleich für schnelle Überprüfung
     original_files = {os.path.basename(f): f for f in source_files}
@@ -728,24 +1441,31 @@ def verify_file_integrity(source_files, target_files):
         print(f"[WARN] {len(extra_files)} Datei(en) im Temp-Ordner, die nicht im Original waren: {extra_files}")
         log_message(f"[WARN] {len(extra_files)} Datei(en) im Temp-Ordner, die nicht im Original waren: {extra_files}")
 
+    # Alle noch fehlenden Hashes in einem Durchgang parallel berechnen
+    pairs = [(original_files[name], copied_files[name]) for name in original_files if name in copied_files]
+    hardlinks = {orig for orig, temp in pairs if os.path.samefile(orig, temp)}  # Gleiche Daten, kein zweites Lesen
+    pending = [orig for orig, _ in pairs if orig not in known_digests]
+    pending += [temp for orig, temp in pairs if orig not in hardlinks]
+    digests = dict(known_digests)
+    digests.update(digest_files(pending))
+
     # Falls alle Dateien existieren, weiter mit Hash-Vergleich
     corrupt_files = []
-    for filename in original_files:
-        if filename in copied_files:
-            orig_file = original_files[filename]
-            temp_file = copied_files[filename]
+    source_hashes = {}
+    for orig_file, temp_file in pairs:
+        filename = os.path.basename(orig_file)
 
-            orig_hash = file_hash(orig_file)
-            temp_hash = file_hash(temp_file)
-            
-            corrupt_log_message = ''
+        orig_hash = digests.get(orig_file)
+        temp_hash = orig_hash if orig_file in hardlinks else digests.get(temp_file)
+        source_hashes[orig_file] = orig_hash
+        
+        corrupt_log_message = ''
+        
+        if orig_hash and temp_hash and orig_hash != temp_hash:
+            corrupt_files.append(filename)
+            corrupt_log_message = f"\n{temp_file} (Kopie) ist beschädigt." 
             
-            if orig_hash and temp_hash and orig_hash != temp_hash:
-                corrupt_files.append(filename)
-                corrupt_log_message = f"\n{temp_file} (Kopie) ist beschädigt." 
-                
-            log_message(f"\n{os.path.basename(orig_file)} - Hash: {orig_hash} (Original)\n{os.path.basename(temp_file)} - Hash: {temp_hash} (Kopie){corrupt_log_message}", 2)
-
+        log_message(f"\n{os.path.basename(orig_file)} - Hash: {orig_hash} (Original)\n{os.path.basename(temp_file)} - Hash: {temp_hash} (Kopie){corrupt_log_message}", 2)
 
     if corrupt_files:
         print(f"[ERROR] {len(corrupt_files)} Datei(en) sind beschädigt: {corrupt_files}")
@@ -756,121 +1476,513 @@ def verify_file_integrity(source_files, target_files):
         print(f"[INFO] Alle Dateien wurden korrekt kopiert.")
         log_message(f"[INFO] Alle Dateien wurden korrekt kopiert.")
 
+    return source_hashes
+
 def get_image_size(image_path):
-    """Liest die Breite und Höhe eines Bildes aus."""
+    """Liest die Breite und Höhe eines Bildes aus dem Metadaten-Index aus."""
     try:
-        with Image.open(image_path) as img:
-            return img.width, img.height
+        width, height, _ = get_image_info(image_path)
+        return width, height
     except Exception as e:
         print(f"[ERROR] Konnte Bildgröße nicht auslesen: {e}")
         log_message(f"[ERROR] Konnte Bildgröße nicht auslesen: {e}")
         return None, None
 
-def resize_and_pad_image(image_path, target_width, target_height, output_path):
-    """Skaliert das Bild auf die Zielgröße und füllt den Hintergrund mit einem unscharfen Bild."""
+def open_reduced_image(image_path, min_width, min_height):
+    """Öffnet ein Bild und dekodiert JPEGs per DCT-Skalierung nur so groß wie für min_width x min_height nötig.
+
+    Gibt das Bild und die Originalgröße zurück (das Seitenverhältnis wird aus der Originalgröße berechnet).
+    """
+    img = Image.open(image_path)
+    original_size = img.size
+    if img.format == "JPEG":
+        # draft() wählt den größten Faktor 1/2, 1/4 oder 1/8, bei dem das Bild noch mindestens so groß bleibt
+        img.draft("RGB", (max(1, min_width), max(1, min_height)))
+    return img, original_size
+
+def load_numpy():
+    """Lädt NumPy beim ersten Bedarf und liefert das Modul oder None, falls es nicht installiert ist."""
+    global np, NUMPY_CHECKED
+    if not NUMPY_CHECKED:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        NUMPY_CHECKED = True
+    return np
+
+def gaussian_box_sizes(sigma, passes=3):
+    """Breiten der Box-Filter, deren mehrfache Anwendung eine Gauß-Unschärfe mit sigma annähert."""
+    ideal_width = math.sqrt(12 * sigma * sigma / passes + 1)
+    lower = int(ideal_width)
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+    num_lower = round((12 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+    return [lower if i < num_lower else upper for i in range(passes)]
+
+def box_blur_axis(arr, radius, axis):
+    """Separabler Box-Filter entlang einer Achse über kumulierte Summen (Randpixel werden fortgesetzt)."""
+    if radius <= 0:
+        return arr
+    padding = [(0, 0)] * arr.ndim
+    padding[axis] = (radius + 1, radius)
+    cumulative = np.cumsum(np.pad(arr, padding, mode="edge"), axis=axis, dtype=np.float32)
+    length = arr.shape[axis]
+    upper = np.take(cumulative, np.arange(2 * radius + 1, 2 * radius + 1 + length), axis=axis)
+    lower = np.take(cumulative, np.arange(0, length), axis=axis)
+    return (upper - lower) / (2 * radius + 1)
+
+def blur_image(img, sigma):
+    """Gauß-Unschärfe, mit NumPy als dreifacher Box-Filter, ohne NumPy über Pillow."""
+    if load_numpy() is None:
+        return img.filter(ImageFilter.GaussianBlur(sigma))
+
+    arr = np.asarray(img, dtype=np.float32)
+    for width in gaussian_box_sizes(sigma):
+        radius = (width - 1) // 2
+        arr = box_blur_axis(box_blur_axis(arr, radius, 0), radius, 1)
+    return Image.fromarray(np.clip(arr + 0.5, 0, 255).astype(np.uint8), img.mode)
+
+def make_blurred_background(img, width, height):
+    """Erzeugt den unscharfen Hintergrund über ein kleines Zwischenbild statt über die volle Zielgröße."""
+    small_size = (max(1, width // BACKGROUND_REDUCTION), max(1, height // BACKGROUND_REDUCTION))
+    small = img.resize(small_size, Image.BILINEAR, reducing_gap=2.0)
+    small = blur_image(small, BACKGROUND_BLUR_RADIUS / BACKGROUND_REDUCTION)
+    return small.resize((width, height), Image.BICUBIC)
+
+def fit_size(img_width, img_height, box_width, box_height):
+    """Größe, mit der ein Bild unter Erhalt des Seitenverhältnisses in die Box passt."""
+    aspect_ratio = img_width / img_height
+    if aspect_ratio > box_width / box_height:
+        return box_width, round(box_width / aspect_ratio)
+    return round(box_height * aspect_ratio), box_height
+
+def compose_padded(img, width, height):
+    """Setzt das eingepasste Bild zentriert auf seinen eigenen unscharfen Hintergrund."""
+    new_width, new_height = fit_size(img.width, img.height, width, height)
+    img_resized = img.resize((new_width, new_height), Image.LANCZOS, reducing_gap=3.0)
+    background = make_blurred_background(img, width, height)
+
+    # Berechnung der Position für das Bild (zentriert)
+    paste_x = (width - new_width) // 2
+    paste_y = (height - new_height) // 2
+
+    if load_numpy() is None:
+        background.paste(img_resized, (paste_x, paste_y))
+        return background
+
+    canvas = np.array(background)
+    canvas[paste_y:paste_y + new_height, paste_x:paste_x + new_width] = np.asarray(img_resized)
+    return canvas
+
+def render_meta_images(image_files, target_width, target_height, single_image_path=None, collage_path=None):
+    """Erstellt Cover (aus dem ersten Bild) und Collage (2x2) in einem Durchgang.
+
+    Jedes Quellbild wird genau einmal dekodiert, und zwar nur so groß, wie es die größte Verwendung erfordert.
+    Gibt die Pfade der erfolgreich erstellten Meta-Bilder zurück.
+    """
+    single_width = target_width // 2
+    single_height = target_height // 2
+    collage_files = image_files[:4] if collage_path and len(image_files) == 4 else []
+
+    # Benötigte Dekodiergröße je Quellbild bestimmen (Cover braucht volle, Kacheln halbe Zielgröße)
+    required_sizes = {}
+    if single_image_path and image_files:
+        required_sizes[image_files[0]] = (target_width, target_height)
+    for img_path in collage_files:
+        size = required_sizes.get(img_path, (0, 0))
+        required_sizes[img_path] = (max(size[0], single_width), max(size[1], single_height))
+
+    decoded = {}
     try:
-        with Image.open(image_path) as img:
-            img_width, img_height = img.size
-            aspect_ratio = img_width / img_height
+        for img_path, (box_width, box_height) in required_sizes.items():
+            img_width, img_height = get_image_size(img_path)
+            img, _ = open_reduced_image(img_path, *fit_size(img_width, img_height, box_width, box_height))
+            with img:
+                decoded[img_path] = img.convert("RGB")
+    except Exception as e:
+        print(f"[ERROR] Konnte Bild nicht dekodieren: {e}")
+        log_message(f"[ERROR] Konnte Bild nicht dekodieren: {e}")
+        return []
 
-            # Berechnung der neuen Größe, um Seitenverhältnis zu bewahren
-            if img_width / img_height > target_width / target_height:
-                new_width = target_width
-                new_height = round(target_width / aspect_ratio)
-            else:
-                new_height = target_height
-                new_width = round(target_height * aspect_ratio)
+    meta_images = []
 
-            img_resized = img.resize((new_width, new_height), Image.LANCZOS)
+    # Single Image erstellen
+    if single_image_path and image_files:
+        try:
+            cover = compose_padded(decoded[image_files[0]], target_width, target_height)
+            if load_numpy() is not None:
+                cover = Image.fromarray(cover)
+            cover.save(single_image_path, quality=100)
+            print(f"[INFO] Das Cover-Bild transformiert und gespeichert: {single_image_path}")
+            log_message(f"[INFO] Das Cover-Bild transformiert und gespeichert: {single_image_path}")
+            debug_log("Das Cover-Image wurde erstellt.", 2)
+            log_message("Das Cover-Image wurde erstellt.", 2)
+            meta_images.append(single_image_path)
+        except Exception as e:
+            print(f"[ERROR] Konnte Bild nicht transformieren: {e}")
+            log_message(f"[ERROR] Konnte Bild nicht transformieren: {e}")
 
-            # Erstelle einen vergrößerten Hintergrund aus dem Bild
-            background = img.resize((target_width, target_height), Image.LANCZOS)
-            background = background.filter(ImageFilter.GaussianBlur(30))  # Starke Unschärfe
-            
-            # Berechnung der Position für das Bild (zentriert)
-            paste_x = (target_width - new_width) // 2
-            paste_y = (target_height - new_height) // 2
+    # Collage erstellen
+    if collage_files:
+        try:
+            positions = [(0, 0), (single_width, 0), (0, single_height), (single_width, single_height)]
+            if load_numpy() is None:
+                collage = Image.new("RGB", (target_width, target_height), (0, 0, 0))
+                for img_path, position in zip(collage_files, positions):
+                    collage.paste(compose_padded(decoded[img_path], single_width, single_height), position)
+            else:
+                canvas = np.zeros((target_height, target_width, 3), dtype=np.uint8)
+                for img_path, (x, y) in zip(collage_files, positions):
+                    canvas[y:y + single_height, x:x + single_width] = compose_padded(decoded[img_path], single_width, single_height)
+                collage = Image.fromarray(canvas)
 
-            # Setzt das eigentliche Bild auf den verschwommenen Hintergrund
-            background.paste(img_resized, (paste_x, paste_y))
+            collage.save(collage_path, quality=100)
+            debug_log("Die Collage wurde erstellt.", 2)
+            log_message("Die Collage wurde erstellt.", 2)
+            meta_images.append(collage_path)
+        except Exception as e:
+            print(f"[ERROR] Konnte Collage nicht erstellen: {e}")
+            log_message(f"[ERROR] Konnte Collage nicht erstellen: {e}")
 
-            background.save(output_path, quality=100)
-            
-            print(f"[INFO] Das Cover-Bild transformiert und gespeichert: {output_path}")
-            log_message(f"[INFO] Das Cover-Bild transformiert und gespeichert: {output_path}")
+    return meta_images
 
-    except Exception as e:
-        print(f"[ERROR] Konnte Bild nicht transformieren: {e}")
-        log_message(f"[ERROR] Konnte Bild nicht transformieren: {e}")
+def resize_and_pad_image(image_path, target_width, target_height, output_path):
+    """Skaliert das Bild auf die Zielgröße und füllt den Hintergrund mit einem unscharfen Bild."""
+    render_meta_images([image_path], target_width, target_height, single_image_path=output_path)
 
 def create_collage(image_files, target_width, target_height, output_path):
     """Erstellt eine Collage aus vier Bildern in einer 2x2-Anordnung."""
-    
-    try:
-        # Collage-Hintergrund erstellen
-        collage = Image.new("RGB", (target_width, target_height), (0, 0, 0))
+    render_meta_images(image_files, target_width, target_height, collage_path=output_path)
 
-        # Berechnung der Einzelbild-Größe
-        single_width = target_width // 2
-        single_height = target_height // 2
+def check_jpeg_structure(img_path):
+    """Schnelle Strukturprüfung eines JPEGs ohne Entropie-Dekodierung.
 
-        positions = [(0, 0), (single_width, 0), (0, single_height), (single_width, single_height)]
+    Prüft SOI, die Segmentlängen, SOF vor SOS, die Scan-Daten bis zum nächsten Marker und das EOI.
+    Gibt (gültig, Grund) zurück.
+    """
+    with open(img_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 4:
+            return False, "Datei zu klein"
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            if data[0] != 0xFF or data[1] != 0xD8:
+                return False, "SOI-Marker fehlt"
+
+            pos = 2
+            seen_sof = False
+            seen_sos = False
+            while pos < size:
+                if data[pos] != 0xFF:
+                    return False, f"Ungültiger Marker an Position {pos}"
+                while pos < size and data[pos] == 0xFF:
+                    pos += 1  # Füll-Bytes
+                if pos >= size:
+                    break
+                marker = data[pos]
+                pos += 1
+
+                if marker == 0xD9:
+                    if not seen_sos:
+                        return False, "EOI vor den Bilddaten"
+                    return True, ""
+                if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                    continue  # Marker ohne Längenfeld
+                if pos + 2 > size:
+                    break
+                length = (data[pos] << 8) | data[pos + 1]
+                if length < 2 or pos + length > size:
+                    return False, f"Segment 0x{marker:02X} abgeschnitten"
+
+                if marker in JPEG_SOF_MARKERS:
+                    seen_sof = True
+                elif marker == 0xDA:
+                    if not seen_sof:
+                        return False, "SOS vor SOF"
+                    seen_sos = True
+                    pos += length
+
+                    # Scan-Daten bis zum nächsten echten Marker überspringen (0xFF00 und RST gehören zu den Daten)
+                    while True:
+                        index = data.find(b"\xff", pos)
+                        if index < 0 or index + 1 >= size:
+                            return False, "Datei abgeschnitten (EOI fehlt)"
+                        following = data[index + 1]
+                        if following == 0x00 or 0xD0 <= following <= 0xD7:
+                            pos = index + 2
+                        elif following == 0xFF:
+                            pos = index + 1
+                        else:
+                            pos = index
+                            break
+                    continue
 
-        for i, img_path in enumerate(image_files):
-            with Image.open(img_path) as img:
-                img_width, img_height = img.size
-                aspect_ratio = img_width / img_height
+                pos += length
 
-                # Skalierung berechnen
-                if aspect_ratio > (single_width / single_height):
-                    new_width = single_width
-                    new_height = round(single_width / aspect_ratio)
-                else:
-                    new_height = single_height
-                    new_width = round(single_height * aspect_ratio)
+    return False, "Datei abgeschnitten (EOI fehlt)"
 
-                img_resized = img.resize((new_width, new_height), Image.LANCZOS)
+def check_jpeg_decode(img_path):
+    """Gründliche Prüfung: Pillow verifiziert die Datei und dekodiert das gesamte Bild."""
+    try:
+        with Image.open(img_path) as img:
+            img.verify()  # Erste Prüfung
+        with Image.open(img_path) as img:
+            img.load()  # Zweite Prüfung: Dekodiert das gesamte Bild
+        return True, ""
+    except (OSError, UnidentifiedImageError, SyntaxError) as e:
+        return False, str(e)
+
+def load_result_cache(cache, lock, file_name):
+    """Lädt gespeicherte Ergebnisse (Schlüssel → Dictionary) aus dem Cache-Ordner (einmal pro Prozess)."""
+    cache_folder = get_cache_folder()
+    if not cache_folder or cache:
+        return
+    try:
+        with open(os.path.join(cache_folder, file_name), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return
+    with lock:
+        for key, result in entries.items():
+            cache.setdefault(key, {}).update(result)
+
+def save_result_cache(cache, lock, file_name):
+    """Speichert Ergebnisse im Cache-Ordner und übernimmt dabei Einträge paralleler Prozesse."""
+    cache_folder = get_cache_folder()
+    if not cache_folder:
+        return
+    cache_path = os.path.join(cache_folder, file_name)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
 
-                # Hintergrundbild (unscharf) erstellen
-                background = img_resized.filter(ImageFilter.GaussianBlur(30))
-                paste_x = (single_width - new_width) // 2
-                paste_y = (single_height - new_height) // 2
+    with lock:
+        for key, result in cache.items():
+            entries.setdefault(key, {}).update(result)
 
-                # Hintergrund in Zielgröße setzen
-                background = background.resize((single_width, single_height), Image.LANCZOS)
-                background.paste(img_resized, (paste_x, paste_y))
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        log_message(f"[WARN] Cache-Datei {file_name} konnte nicht gespeichert werden: {e}")
+
+def load_validation_cache():
+    """Lädt die gespeicherten Validierungsergebnisse aus dem Cache-Ordner (einmal pro Prozess)."""
+    load_result_cache(VALIDATION_CACHE, VALIDATION_CACHE_LOCK, VALIDATION_CACHE_FILE)
+
+def save_validation_cache():
+    """Speichert die Validierungsergebnisse und übernimmt dabei Einträge paralleler Prozesse."""
+    save_result_cache(VALIDATION_CACHE, VALIDATION_CACHE_LOCK, VALIDATION_CACHE_FILE)
+
+def validate_single_jpeg(img_path, cache_key, deep):
+    """Prüft ein JPEG mit der schnellen und optional der gründlichen Stufe, bereits geprüfte Hashes werden übersprungen."""
+    cached = VALIDATION_CACHE.get(cache_key, {}) if cache_key else {}
+    tiers = [("fast", check_jpeg_structure)]
+    if deep:
+        tiers.append(("deep", check_jpeg_decode))
+
+    for tier, check in tiers:
+        if tier in cached:
+            if not cached[tier]:
+                return False, f"{tier}: bekannter Fehler (Cache)"
+            continue
+        try:
+            valid, reason = check(img_path)
+        except (OSError, ValueError) as e:
+            valid, reason = False, str(e)
+        if cache_key:
+            with VALIDATION_CACHE_LOCK:
+                VALIDATION_CACHE.setdefault(cache_key, {})[tier] = valid
+        if not valid:
+            return False, f"{tier}: {reason}"
+    return True, ""
+
+def validate_jpeg_files(image_list, digests=None):
+    """Überprüft, ob die JPEG-Dateien gültig sind und entfernt defekte.
+
+    validate_mode 1 prüft nur die Struktur (Marker, Segmentlängen, Abschneiden), 2 dekodiert zusätzlich jedes Bild.
+    Ergebnisse werden je Datei-Hash gecacht; bekannte Hashes können über digests (Pfad → Hash) übergeben werden.
+    """
+    if not image_list:
+        return []
 
-                # Bild in Collage einfügen
-                collage.paste(background, positions[i])
+    deep = config['parameters'].get('validate_mode', 1) == 2
+    algorithm = get_integrity_digest()
+    digests = dict(digests or {})
 
-        # Speichern der Collage
-        collage.save(output_path, quality=100)
-        debug_log("Die Collage wurde erstellt.", 2)
-        log_message("Die Collage wurde erstellt.", 2)
+    cache_keys = {}
+    if get_cache_folder():
+        load_validation_cache()
+        missing = [path for path in image_list if not digests.get(path)]
+        digests.update(digest_files(missing, algorithm))
+        cache_keys = {path: f"{algorithm}:{digests[path]}" for path in image_list if digests.get(path)}
 
-    except Exception as e:
-        print(f"[ERROR] Konnte Collage nicht erstellen: {e}")
-        log_message(f"[ERROR] Konnte Collage nicht erstellen: {e}")
+    workers = min(get_worker_count('optimize_workers'), len(image_list))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda path: validate_single_jpeg(path, cache_keys.get(path), deep), image_list))
 
-def validate_jpeg_files(image_list):
-    """Überprüft, ob die JPEG-Dateien gültig sind und entfernt defekte."""
     valid_images = []
-
-    for img_path in image_list:
-        try:
-            with Image.open(img_path) as img:
-                img.verify()  # Erste Prüfung
-            with Image.open(img_path) as img:
-                img.load()  # Zweite Prüfung: Dekodiert das gesamte Bild
+    for img_path, (valid, reason) in zip(image_list, results):
+        if valid:
             valid_images.append(img_path)
-        except (OSError, UnidentifiedImageError):
+        else:
             print(f"[ERROR] Defekte JPEG-Datei gefunden: {os.path.basename(img_path)} - wird übersprungen.")
-            log_message(f"[ERROR] Defekte JPEG-Datei gefunden: {os.path.basename(img_path)} - wird übersprungen.")
+            log_message(f"[ERROR] Defekte JPEG-Datei gefunden: {os.path.basename(img_path)} - wird übersprungen. ({reason})")
+
+    if cache_keys:
+        save_validation_cache()
 
     return valid_images
 
-def optimize_images_old(image_list, optim_profile):
-    """Optimiert eine Liste von Bildern mit den Tools und Einstellungen aus config.json."""
+def get_worker_count(parameter, default=0, section='parameters'):
+    """Ermittelt die Anzahl paralleler Worker aus der Config (0 = Anzahl der CPU-Kerne)."""
+    try:
+        workers = int(config[section].get(parameter, default))
+    except (TypeError, ValueError):
+        workers = default
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def run_pillow_optimizer(img_path, params):
+    """Optimiert ein JPEG ohne externes Tool: optimierte Huffman-Tabellen, optional progressiv und/oder mit neuer Qualität.
+
+    Mit quality = "keep" werden Quantisierungstabellen und Subsampling des Originals übernommen,
+    mit quality = "skip" bleibt das Bild unverändert (Pillow kann JPEGs nicht bitgenau neu schreiben).
+    Das Ergebnis ersetzt das Bild nur, wenn es kleiner ist. EXIF- und ICC-Daten bleiben erhalten.
+    """
+    start_time = time.perf_counter()
+    run = {"error": None, "duration": 0.0}
+    quality = params.get("quality", "keep")
+    if quality == "skip":
+        return run
+    temp_path = f"{img_path}.{threading.get_ident()}.pillow.tmp"
+
+    try:
+        with Image.open(img_path) as img:
+            if quality == "keep" and img.format != "JPEG":
+                quality = 95  # "keep" ist nur für JPEG-Quellen möglich
+            save_params = {"format": "JPEG", "optimize": True, "progressive": bool(params.get("progressive", 1)),
+                           "quality": quality}
+            if quality == "keep":
+                save_params["subsampling"] = "keep"
+            for key in ("exif", "icc_profile"):
+                if img.info.get(key):
+                    save_params[key] = img.info[key]
+            if img.mode not in ("RGB", "L", "CMYK"):
+                img = img.convert("RGB")
+            img.save(temp_path, **save_params)
+
+        if os.path.getsize(temp_path) < os.path.getsize(img_path):
+            os.replace(temp_path, img_path)
+        else:
+            os.remove(temp_path)  # Keine Ersparnis, Original bleibt unverändert
+    except (OSError, ValueError, SyntaxError) as e:
+        run["error"] = str(e)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    run["duration"] = time.perf_counter() - start_time
+    return run
+
+def get_optimize_backend(tool_profile):
+    """Backend eines Tool-Profils: "tools" (externe Tools), "pillow" (im Prozess) oder "auto"."""
+    backend = config.get('optimize_backend', {}).get(tool_profile, "tools")
+    return backend if backend in ("tools", "pillow", "auto") else "tools"
+
+def get_required_tools():
+    """Tools, die für den Lauf zwingend vorhanden sein müssen (Profile mit Backend "tools" und externe Packer)."""
+    required = set()
+    for tool_profile, tools in config.get('tool_order', {}).items():
+        if get_optimize_backend(tool_profile) == "tools":
+            required.update(tool for tool in tools if tool != PILLOW_TOOL)
+    archive_paths = {profile.get("path") for profile in config.get('compression_profiles', {}).values()
+                     if profile.get("active", 1) and profile.get("engine") != "zipfile"}
+    required.update(tool for tool, data in config['tools'].items() if data.get("path") in archive_paths)
+    return [tool for tool in config['tools'] if tool in required]
+
+def optimize_single_image(img_path, tools, tool_params, profile_name=None):
+    """Führt die Tool-Kette für ein einzelnes Bild in fester Reihenfolge aus und sammelt die Ausgaben."""
+    messages = []  # (Nachricht, Log-Level) für die spätere Ausgabe im Hauptthread
+    errors = []
+
+    # Bekannte Bilder werden direkt aus dem Cache übernommen, ohne ein Tool zu starten.
+    # Der Schlüssel folgt der konfigurierten Kette, nicht der adaptiv gekürzten, sonst ginge er mit jeder Statistik verloren
+    cache_key = None
+    if profile_name and get_cache_folder():
+        input_hash = file_hash(img_path)
+        if input_hash:
+            cache_key = get_cache_key(input_hash, profile_name, tools, tool_params)
+            if cache_lookup(cache_key, img_path):
+                messages.append((f"[DEBUG] Cache-Treffer ({cache_key[:12]})", 2))
+                return messages, errors
+
+    # Im adaptiven Modus entfallen Tools, die bei ähnlichen Bildern bisher kaum etwas eingespart haben
+    selected_tools, stats_bucket = select_tools(img_path, tools, profile_name)
+    if len(selected_tools) < len(tools):
+        skipped = [tool for tool in tools if tool not in selected_tools]
+        messages.append((f"[DEBUG] Adaptiv übersprungen: {', '.join(skipped)}", 2))
+        tools = selected_tools
+
+    for tool in tools:
+        tool_config = config['tools'].get(tool)
+        if tool == PILLOW_TOOL:
+            # Eingebautes Backend: kein Prozessstart, die Parameter kommen aus pillow_parameters
+            size_before = os.path.getsize(img_path)
+            with span(tool, "tool", image=os.path.basename(img_path)) as trace_args:
+                run = run_pillow_optimizer(img_path, tool_params.get(PILLOW_TOOL, {}))
+                trace_args["saved_bytes"] = size_before - os.path.getsize(img_path)
+            if run["error"]:
+                errors.append(f"Fehler bei {tool}: {run['error']}")
+            elif stats_bucket:
+                record_tool_run(stats_bucket, tool, size_before, os.path.getsize(img_path), run["duration"])
+        elif tool_config and tool_config['path']:
+            tool_path = tool_config['path']
+            tool_args = tool_params.get(tool, "")
+
+            # Falls das Tool 'guetzli' ist, wird ein temporärer Output-Pfad benötigt
+            cmd = [tool_path] + shlex.split(tool_args) + [img_path]
+            if tool == "guetzli":
+                output_path = img_path + "_optimized.jpg"  # Temporärer Pfad
+                cmd.append(output_path)
+
+            # Die Ausgabe der Tools geht direkt ins Log, Laufzeit und Exit-Code werden protokolliert
+            size_before = os.path.getsize(img_path)
+            with span(tool, "tool", image=os.path.basename(img_path)) as trace_args:
+                run = run_tool(tool, cmd, label=f"{os.path.basename(img_path)}: {tool}")
+
+                # Falls guetzli, dann das optimierte Bild zurückkopieren
+                if tool == "guetzli" and os.path.exists(output_path):
+                    if run["error"]:
+                        os.remove(output_path)  # Unvollständige Ausgabe (z.B. nach Timeout) verwerfen
+                    else:
+                        shutil.move(output_path, img_path)  # Ersetze Originalbild
+                trace_args["saved_bytes"] = size_before - os.path.getsize(img_path)
+
+            if run["error"]:
+                # Die restliche Kette wird trotzdem ausgeführt, wie im seriellen Ablauf
+                errors.append(f"Fehler bei {tool}: {run['error']}")
+            elif stats_bucket:
+                record_tool_run(stats_bucket, tool, size_before, os.path.getsize(img_path), run["duration"])
+
+    # Nur vollständig durchlaufene Ketten werden gecacht
+    if cache_key and not errors:
+        cache_store(cache_key, img_path)
+
+    return messages, errors
+
+def optimize_images(image_list, optim_profile, done_callback=None):
+    """Optimiert eine Liste von Bildern mit den Tools und Einstellungen aus config.json.
+
+    done_callback wird im Hauptthread für jedes fehlerfrei optimierte Bild aufgerufen (z.B. für das Journal).
+    """
 
     if not image_list:
         print("[INFO] Keine Bilder zur Optimierung vorhanden.")
@@ -878,173 +1990,421 @@ def optimize_images_old(image_list, optim_profile):
         return
 
     # Richtige Parameter-Sektion aus der Config laden
-    profile_key = f"tool_parameters_{config['profile_selection'][optim_profile]}"
-    log_message(f"Lädt das Bilder-Profil {config['profile_selection'][optim_profile]} mit dem Tool-Profil {profile_key}.", 2)
-    tool_params = config.get(profile_key, {})
+    tool_profile = config['profile_selection'][optim_profile]
+    profile_key = f"tool_parameters_{tool_profile}"
+    log_message(f"Lädt das Bilder-Profil {tool_profile} mit dem Tool-Profil {profile_key}.", 2)
+    tool_params = dict(config.get(profile_key, {}))
+    tool_params[PILLOW_TOOL] = config.get('pillow_parameters', {}).get(tool_profile, {})
+    pillow_quality = tool_params[PILLOW_TOOL].get("quality", "keep")
+
     # Logge die Parameter der Tools
     for tool, params in tool_params.items():
         log_message(f"Parameter von {tool}: {params}", 2)
 
     # Tool-Reihenfolge aus der Config ermitteln oder Defaults verwenden
     tools = config['tool_order'].get(config['profile_selection'][optim_profile], list(tool_params.keys()))
-
     log_message(f"[DEBUG] Reihenfolge der Tools: {tools}", 2)
 
-    for img_path in image_list:
-        for tool in tools:
-            tool_config = config['tools'].get(tool)
-            if tool_config and tool_config['path']:
-                tool_path = tool_config['path']
-                tool_args = tool_params.get(tool, "")
+    # Backend des Profils: externe Tools, eingebautes Pillow-Backend oder automatische Wahl
+    backend = get_optimize_backend(tool_profile)
+    if backend == "pillow":
+        tools = [PILLOW_TOOL]
 
-                if tool_args:
-                    cmd = f'"{tool_path}" {tool_args} "{img_path}"'
-                    try:
-                        # Korrektur: Resultat wird gespeichert
-                        result = subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                        
-                        # Tool-Output loggen
-                        if result.stdout.strip():
-                            log_message(f"[DEBUG] {tool} output:\n{result.stdout}", 2)
-                        if result.stderr.strip():
-                            log_message(f"[ERROR] {tool} Fehler:\n{result.stderr}")
-
-                    except subprocess.CalledProcessError as e:
-                        print(f"[ERROR] Fehler bei {tool}: {e}")
-                        log_message(f"[ERROR] Fehler bei {tool}: {e}")
+    # Tools werden erst hier (und nur einmal pro Pfad) geprüft, fehlende Tools werden übersprungen
+    missing_tools = [tool for tool in tools if tool != PILLOW_TOOL and not tool_exists(config['tools'].get(tool, {}).get('path', ""))]
+    if missing_tools:
+        tools = [tool for tool in tools if tool not in missing_tools]
+        if backend == "auto" and not tools:
+            if pillow_quality == "skip":
+                print(f"[WARN] Keine Tools für Profil '{tool_profile}' gefunden, die Bilder bleiben unoptimiert (Pillow quality = skip).")
+                log_message(f"[WARN] Keine Tools für Profil '{tool_profile}' gefunden, die Bilder bleiben unoptimiert (Pillow quality = skip).")
+            else:
+                print(f"[INFO] Keine Tools für Profil '{tool_profile}' gefunden, verwende das Pillow-Backend.")
+                log_message(f"[INFO] Keine Tools für Profil '{tool_profile}' gefunden, verwende das Pillow-Backend.")
+            tools = [PILLOW_TOOL]
+        else:
+            print(f"[WARN] Tool(s) nicht gefunden und übersprungen: {', '.join(missing_tools)}")
+            log_message(f"[WARN] Tool(s) nicht gefunden und übersprungen: {', '.join(missing_tools)}")
+
+    # Im Automatikmodus werden kleine Dateien im Prozess optimiert, ein Toolstart lohnt sich für sie nicht
+    small_file_limit = int(config.get('pillow_parameters', {}).get('small_file_kb', 0)) * 1024 if backend == "auto" else 0
+    image_tools = {img_path: [PILLOW_TOOL] if small_file_limit and os.path.getsize(img_path) < small_file_limit else tools
+                   for img_path in image_list}
+
+    # Das Pillow-Backend kodiert neu: im verlustfreien Profil ist das Ergebnis dann nicht mehr bitgenau
+    if (tool_profile == "lossless" and pillow_quality != "skip"
+            and any(PILLOW_TOOL in tools_for_image for tools_for_image in image_tools.values())):
+        print(f"[WARN] Das Pillow-Backend kodiert die Bilder des verlustfreien Profils neu (quality = {pillow_quality}), das Ergebnis ist nicht bitgenau.")
+        log_message(f"[WARN] Das Pillow-Backend kodiert die Bilder des verlustfreien Profils neu (quality = {pillow_quality}), das Ergebnis ist nicht bitgenau.")
+
+    # Jedes Bild durchläuft seine Tool-Kette in einem eigenen Worker, die Reihenfolge innerhalb eines Bildes bleibt strikt
+    workers = min(get_worker_count('optimize_workers'), len(image_list))
+    log_message(f"[DEBUG] Optimierung mit {workers} parallelen Worker(n).", 2)
+
+    failed_images = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(optimize_single_image, img_path, image_tools[img_path], tool_params, tool_profile): img_path
+                   for img_path in image_list}
+
+        # Ergebnisse werden im Hauptthread gesammelt, damit die Log-Ausgabe pro Bild zusammenhängend bleibt
+        for future in as_completed(futures):
+            img_path = futures[future]
+            try:
+                messages, errors = future.result()
+            except Exception as e:
+                messages, errors = [], [f"Unerwarteter Fehler: {e}"]
+
+            for message, level in messages:
+                log_message(f"{os.path.basename(img_path)}: {message}", level)
+            for error in errors:
+                print(f"[ERROR] {os.path.basename(img_path)}: {error}")
+                log_message(f"[ERROR] {os.path.basename(img_path)}: {error}")
+            if errors:
+                failed_images += 1
+            elif done_callback:
+                done_callback(img_path)
+
+    if failed_images:
+        log_message(f"[WARN] Bei {failed_images} von {len(image_list)} Bildern sind Fehler aufgetreten.")
+
+    if get_cache_folder():
+        save_tool_stats()
+        enforce_cache_limit()
+        log_message(f"Bild-Cache: {CACHE_STATS['hits']} Treffer, {CACHE_STATS['misses']} Fehlschläge, "
+                    f"{CACHE_STATS['stores']} gespeichert, {CACHE_STATS['evictions']} verdrängt", 2)
 
     print(f"[INFO] {len(image_list)} Bilder optimiert mit Profil '{optim_profile}'.")
     log_message(f"[INFO] {len(image_list)} Bilder optimiert mit Profil '{optim_profile}'.")
 
-def optimize_images(image_list, optim_profile):
-    """Optimiert eine Liste von Bildern mit den Tools und Einstellungen aus config.json."""
-
-    if not image_list:
-        print("[INFO] Keine Bilder zur Optimierung vorhanden.")
-        log_message("[INFO] Keine Bilder zur Optimierung vorhanden.")
-        return
+def build_archive_command(compression_profile, image_archive_name, meta_images, archive_path):
+    """Baut die Kommandozeile (argv-Liste) und den Ausgabepfad für ein Kompressionsprofil."""
 
-    # Richtige Parameter-Sektion aus der Config laden
-    profile_key = f"tool_parameters_{config['profile_selection'][optim_profile]}"
-    log_message(f"Lädt das Bilder-Profil {config['profile_selection'][optim_profile]} mit dem Tool-Profil {profile_key}.", 2)
-    tool_params = config.get(profile_key, {})
+    if compression_profile not in config["compression_profiles"]:
+        print(f"[ERROR] Kompressionsprofil '{compression_profile}' nicht gefunden!")
+        log_message(f"[ERROR] Kompressionsprofil '{compression_profile}' nicht gefunden!")
+        return None, None
 
-    # Logge die Parameter der Tools
-    for tool, params in tool_params.items():
-        log_message(f"Parameter von {tool}: {params}", 2)
+    profile = config["compression_profiles"][compression_profile]
+    file_extension = profile.get("filext", "zip")  # Standard auf ZIP setzen, falls nicht definiert
 
-    # Tool-Reihenfolge aus der Config ermitteln oder Defaults verwenden
-    tools = config['tool_order'].get(config['profile_selection'][optim_profile], list(tool_params.keys()))
-    log_message(f"[DEBUG] Reihenfolge der Tools: {tools}", 2)
+    # Output-Dateipfad setzen
+    output_path = os.path.join(archive_path, f"{image_archive_name}.{file_extension}")
 
-    for img_path in image_list:
-        for tool in tools:
-            tool_config = config['tools'].get(tool)
-            if tool_config and tool_config['path']:
-                tool_path = tool_config['path']
-                tool_args = tool_params.get(tool, "")
+    # Eingebauter Packer: kein Kommando, die Eingaben gehen direkt an write_zip_archive
+    if profile.get("engine") == "zipfile":
+        return [], output_path
 
-                # Falls das Tool 'guetzli' ist, wird ein temporärer Output-Pfad benötigt
-                if tool == "guetzli":
-                    output_path = img_path + "_optimized.jpg"  # Temporärer Pfad
+    tool_path = profile["path"]
+    parameters = profile["parameters"]
 
-                    cmd = f'"{tool_path}" {tool_args} "{img_path}" "{output_path}"'
-                else:
-                    cmd = f'"{tool_path}" {tool_args} "{img_path}"'  # Standard-Pfad
+    if not tool_exists(tool_path):
+        print(f"[ERROR] Kompressionstool '{tool_path}' nicht gefunden!")
+        log_message(f"[ERROR] Kompressionstool '{tool_path}' nicht gefunden!")
+        return None, None
 
-                try:
-                    # Korrektur: Resultat wird gespeichert
-                    result = subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # Parameter nach `order` sortieren und Werte extrahieren
+    sorted_params = sorted(parameters.values(), key=lambda x: x["order"])
+    cmd = [tool_path]
 
-                    # Falls guetzli, dann das optimierte Bild zurückkopieren
-                    if tool == "guetzli":
-                        if os.path.exists(output_path):  # Prüfe, ob das optimierte Bild existiert
-                            shutil.move(output_path, img_path)  # Ersetze Originalbild
+    # Ohne Shell werden die Parameter selbst in Einzelargumente zerlegt, Platzhalter ersetzen ganze Argumente
+    for param in sorted_params:
+        for value in shlex.split(param["value"]):
+            if value == "ipt:input":
+                cmd.extend(meta_images)  # Alle Dateien einsetzen
+            else:
+                cmd.append(value.replace("ipt:output", output_path))
+
+    return cmd, output_path
+
+def collect_archive_entries(inputs):
+    """Listet die Archiv-Einträge wie 7-Zip: Dateien unter ihrem Namen, Ordner rekursiv mit dem Ordnernamen als Präfix."""
+    entries = []  # (Pfad, Name im Archiv, ist Ordner)
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            parent = os.path.dirname(os.path.normpath(input_path))
+            for dirpath, dirnames, filenames in os.walk(input_path):
+                dirnames.sort()
+                entries.append((dirpath, os.path.relpath(dirpath, parent).replace(os.sep, "/") + "/", True))
+                for name in sorted(filenames):
+                    full_path = os.path.join(dirpath, name)
+                    entries.append((full_path, os.path.relpath(full_path, parent).replace(os.sep, "/"), False))
+        else:
+            entries.append((input_path, os.path.basename(input_path), False))
+    return entries
 
-                    # Tool-Output loggen
-                    if result.stdout.strip():
-                        log_message(f"[DEBUG] {tool} output:\n{result.stdout}", 2)
-                    if result.stderr.strip():
-                        log_message(f"[ERROR] {tool} Fehler:\n{result.stderr}")
+def choose_entry_method(data, profile):
+    """Wählt das Verfahren für einen Eintrag anhand einer schnellen Probekompression eines Ausschnitts.
 
-                except subprocess.CalledProcessError as e:
-                    print(f"[ERROR] Fehler bei {tool}: {e}")
-                    log_message(f"[ERROR] Fehler bei {tool}: {e}")
+    Kaum komprimierbare Daten (z.B. optimierte JPEGs) werden gespeichert, gut komprimierbare (Text, Metadaten)
+    bekommen das aufwendige Verfahren, alles dazwischen Deflate.
+    """
+    sample = data[len(data) // 2:len(data) // 2 + ZIP_SAMPLE_SIZE] if len(data) > ZIP_SAMPLE_SIZE else data
+    if not sample:
+        return zipfile.ZIP_STORED
+    ratio = len(zlib.compress(sample, 1)) / len(sample)
+    if ratio >= float(profile.get("store_ratio", 0.95)):
+        return zipfile.ZIP_STORED
+    if ratio >= float(profile.get("heavy_ratio", 0.6)):
+        return zipfile.ZIP_DEFLATED
+    return ZIP_ENGINE_METHODS.get(profile.get("heavy_method", "bzip2"), zipfile.ZIP_BZIP2)
+
+def compress_zip_entry(path, method, profile):
+    """Liest und komprimiert einen Archiv-Eintrag (läuft im Thread-Pool, zlib und bz2 geben dabei den GIL frei).
+
+    method None bedeutet Auswahl je Eintrag. Liefert (Verfahren, CRC, Originalgröße, Daten).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    if method is None:
+        method = choose_entry_method(data, profile)
+    level = int(profile.get("level", 9))
+
+    if method == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)  # Roher Deflate-Strom ohne zlib-Header
+        compressed = compressor.compress(data) + compressor.flush()
+    elif method == zipfile.ZIP_BZIP2:
+        compressed = bz2.compress(data, level)
+    else:
+        compressed = data
 
-    print(f"[INFO] {len(image_list)} Bilder optimiert mit Profil '{optim_profile}'.")
-    log_message(f"[INFO] {len(image_list)} Bilder optimiert mit Profil '{optim_profile}'.")
+    # Wird ein Eintrag durch die Kompression größer, wird er unkomprimiert gespeichert
+    if method != zipfile.ZIP_STORED and len(compressed) >= len(data):
+        method, compressed = zipfile.ZIP_STORED, data
+    return method, crc, len(data), compressed
 
-def create_archive(compression_profile, image_archive_name, meta_images, archive_path):
-    """Erstellt ein Archiv mit dem gewählten Kompressionsprofil."""
+def write_zip_archive(output_path, inputs, profile, should_abort=None):
+    """Erstellt ein ZIP-Archiv im Prozess: Einträge werden parallel komprimiert und in fester Reihenfolge geschrieben.
 
-    if compression_profile not in config["compression_profiles"]:
-        print(f"[ERROR] Kompressionsprofil '{compression_profile}' nicht gefunden!")
-        log_message(f"[ERROR] Kompressionsprofil '{compression_profile}' nicht gefunden!")
-        return
+    Das fertige Archiv wird anschließend gelesen und geprüft (verify_zip_archive), ein defektes Archiv gilt als Fehler.
+    Liefert ein Ergebnis im Format von run_tool (error, aborted, duration).
+    """
+    start_time = time.perf_counter()
+    run = {"error": None, "aborted": None, "duration": 0.0}
+    method_name = profile.get("method", "deflate")
+    method = None if method_name == "auto" else ZIP_ENGINE_METHODS.get(method_name, zipfile.ZIP_DEFLATED)
+    try:
+        threads = int(profile.get("threads", 0))
+    except (TypeError, ValueError):
+        threads = 0
+    threads = threads if threads > 0 else (os.cpu_count() or 1)
+
+    entries = collect_archive_entries(inputs)
+    file_entries = [(path, name) for path, name, is_dir in entries if not is_dir]
+    method_counts = collections.Counter()
 
+    try:
+        with zipfile.ZipFile(output_path, "w") as archive, ThreadPoolExecutor(max_workers=threads) as executor:
+            # Begrenztes Fenster an laufenden Aufgaben, damit nicht alle komprimierten Daten gleichzeitig im Speicher liegen
+            pending = collections.deque()
+            file_iter = iter(file_entries)
+            for path, name in itertools.islice(file_iter, threads * 2):
+                pending.append((path, name, executor.submit(compress_zip_entry, path, method, profile)))
+
+            for path, name, is_dir in entries:
+                zinfo = zipfile.ZipInfo.from_file(path, name)
+                if is_dir:
+                    archive.writestr(zinfo, b"")
+                    continue
+
+                _, _, future = pending.popleft()
+                entry_method, crc, file_size, compressed = future.result()
+                method_counts[entry_method] += 1
+                for next_path, next_name in itertools.islice(file_iter, 1):
+                    pending.append((next_path, next_name, executor.submit(compress_zip_entry, next_path, method, profile)))
+
+                write_precompressed_entry(archive, zinfo, entry_method, crc, file_size, compressed)
+
+                if should_abort is not None:
+                    run["aborted"] = should_abort()
+                    if run["aborted"]:
+                        for _, _, waiting in pending:
+                            waiting.cancel()
+                        break
+    except (OSError, ValueError, zipfile.LargeZipFile) as e:
+        run["error"] = str(e)
+
+    # Die Einträge werden über zipfile-Interna geschrieben, daher wird das Ergebnis vor der Verwendung geprüft
+    if not run["error"] and not run["aborted"]:
+        run["error"] = verify_zip_archive(output_path, len(entries))
+
+    run["duration"] = time.perf_counter() - start_time
+    methods = ", ".join(f"{count}x {ZIP_METHOD_NAMES.get(entry_method, entry_method)}" for entry_method, count in method_counts.items())
+    log_message(f"[DEBUG] {os.path.basename(output_path)}: {len(file_entries)} Einträge ({methods}) mit {threads} Thread(s) in {run['duration']:.2f}s"
+                + (f" ({run['error'] or run['aborted']})" if run['error'] or run['aborted'] else ""), 2)
+    with TOOL_RUNS_LOCK:
+        TOOL_RUNS.append({"tool": "zipfile", "returncode": None, "duration": run["duration"], "timed_out": False,
+                          "aborted": run["aborted"], "error": run["error"]})
+    return run
+
+def write_precompressed_entry(archive, zinfo, method, crc, file_size, compressed):
+    """Hängt bereits komprimierte Daten als Eintrag an ein zum Schreiben geöffnetes ZipFile an.
+
+    zipfile bietet dafür keine öffentliche Schnittstelle: Lokaler Header über ZipInfo.FileHeader, das zentrale
+    Verzeichnis schreibt ZipFile beim Schließen aus filelist. Verwendet die privaten Attribute fp, filelist,
+    NameToInfo, start_dir und _didModify, getestet mit Python 3.11. Da sich diese ohne Ankündigung ändern können,
+    prüft write_zip_archive jedes Archiv nach dem Schreiben.
+    """
+    missing = [name for name in ("fp", "filelist", "NameToInfo", "start_dir", "_didModify") if not hasattr(archive, name)]
+    if missing:
+        raise ValueError(f"zipfile-Interna nicht vorhanden: {', '.join(missing)}")
+
+    zinfo.compress_type = method
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(compressed)
+    zip64 = file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+
+    fp = archive.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+    fp.write(compressed)
+    archive.filelist.append(zinfo)
+    archive.NameToInfo[zinfo.filename] = zinfo
+    archive.start_dir = fp.tell()
+    archive._didModify = True
+
+def verify_zip_archive(output_path, expected_entries):
+    """Liest ein fertiges ZIP-Archiv vollständig und prüft CRCs und Anzahl der Einträge.
+
+    Liefert None, wenn das Archiv in Ordnung ist, sonst eine Fehlerbeschreibung.
+    """
+    try:
+        with zipfile.ZipFile(output_path) as archive:
+            bad_entry = archive.testzip()
+            entry_count = len(archive.infolist())
+    except (OSError, EOFError, ValueError, NotImplementedError, zipfile.BadZipFile, zlib.error) as e:
+        return f"Archivprüfung fehlgeschlagen: {e}"
+    if bad_entry is not None:
+        return f"Archivprüfung fehlgeschlagen: Eintrag {bad_entry} ist defekt"
+    if entry_count != expected_entries:
+        return f"Archivprüfung fehlgeschlagen: {entry_count} statt {expected_entries} Einträgen"
+    return None
+
+def run_archive_profile(compression_profile, cmd, output_path, inputs, should_abort=None):
+    """Führt ein Kompressionsprofil aus: eingebauter ZIP-Packer oder externes Tool."""
     profile = config["compression_profiles"][compression_profile]
-    tool_path = profile["path"]
-    parameters = profile["parameters"]
-    file_extension = profile.get("filext", "zip")  # Standard auf ZIP setzen, falls nicht definiert
+    if profile.get("engine") == "zipfile":
+        return write_zip_archive(output_path, inputs, profile, should_abort)
+    return run_tool(compression_profile, cmd, should_abort=should_abort)
 
-    if not os.path.exists(tool_path):
-        print(f"[ERROR] Kompressionstool '{tool_path}' nicht gefunden!")
-        log_message(f"[ERROR] Kompressionstool '{tool_path}' nicht gefunden!")
-        return
+def create_archive(compression_profile, image_archive_name, meta_images, archive_path):
+    """Erstellt ein Archiv mit dem gewählten Kompressionsprofil."""
 
-    # Output-Dateipfad setzen
-    output_path = os.path.join(archive_path, f"{image_archive_name}.{file_extension}")
+    cmd, output_path = build_archive_command(compression_profile, image_archive_name, meta_images, archive_path)
+    if cmd is None:
+        return
 
-    # Alle Input-Dateien aus meta_images zusammenfügen
-    input_files = " ".join(f'"{file}"' for file in meta_images)
+    run = run_archive_profile(compression_profile, cmd, output_path, meta_images)
+    if run["error"]:
+        print(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {run['error']}")
+        log_message(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {run['error']}")
+    else:
+        log_message(f"[INFO] Archiv erstellt mit Profil '{compression_profile}': {output_path}")
 
-    # Parameter nach `order` sortieren und Werte extrahieren
-    sorted_params = sorted(parameters.values(), key=lambda x: x["order"])
-    cmd_parts = [f'"{tool_path}"']
-    
-    for param in sorted_params:
-        value = param["value"]
-        value = value.replace("ipt:output", f'"{output_path}"')
-        if "ipt:input" in value:
-            value = value.replace("ipt:input", input_files)  # Alle Dateien ersetzen
-        cmd_parts.append(value)
+    return output_path  # Rückgabe des Archivpfads für spätere Verarbeitung
 
-    cmd = " ".join(cmd_parts)
+def get_partial_archive_size(output_path):
+    """Liefert die aktuelle Größe eines noch entstehenden Archivs (inkl. temporärer Datei des Packers)."""
+    size = 0
+    for path in (output_path, output_path + ".tmp"):
+        try:
+            size = max(size, os.path.getsize(path))
+        except OSError:
+            pass
+    return size
+
+def run_archive_candidate(compression_profile, cmd, output_path, race, inputs):
+    """Erstellt ein Test-Archiv und bricht ab, sobald es größer als ein fertiges Konkurrenz-Archiv ist."""
+
+    # Reste eines früheren Laufs entfernen, sonst würde 7-Zip das vorhandene Archiv aktualisieren
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    def check_race():
+        with race["lock"]:
+            best_size = race["best_size"]
+        partial_size = get_partial_archive_size(output_path)
+        if partial_size > best_size:
+            # Das Teilarchiv ist bereits größer als ein fertiger Konkurrent und kann nicht mehr gewinnen
+            return f"{partial_size} Bytes > {best_size} Bytes"
+        return None
 
-    try:
-        result = subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    with span(compression_profile, "archive") as trace_args:
+        run = run_archive_profile(compression_profile, cmd, output_path, inputs, should_abort=check_race)
+        trace_args["status"] = "aborted" if run["aborted"] else ("error" if run["error"] else "done")
 
-        log_message(f"[INFO] Archiv erstellt mit Profil '{compression_profile}': {output_path}")
-        if result.stdout.strip():
-            log_message(f"[DEBUG] {tool_path} output:\n{result.stdout}", 2)
-        if result.stderr.strip():
-            log_message(f"[ERROR] {tool_path} Fehler:\n{result.stderr}")
+    if run["aborted"] or run["error"]:
+        for path in (output_path, output_path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    if run["aborted"]:
+        return {"profile": compression_profile, "status": "aborted", "path": output_path, "reason": run["aborted"]}
+    if run["error"] or not os.path.exists(output_path):
+        return {"profile": compression_profile, "status": "error", "path": output_path,
+                "error": run["error"] or "Archiv wurde nicht erstellt"}
 
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {e}")
-        log_message(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {e}")
+    size = os.path.getsize(output_path)
+    with race["lock"]:
+        race["best_size"] = min(race["best_size"], size)
 
-    return output_path  # Rückgabe des Archivpfads für spätere Verarbeitung
+    return {"profile": compression_profile, "status": "done", "path": output_path, "size": size}
 
 def create_best_archive(image_archive_name, meta_images):
-    """Erstellt Archive mit allen Profilen und wählt das kleinste für den Output."""
+    """Erstellt Archive mit allen Profilen gleichzeitig und wählt das kleinste für den Output."""
+    best_archive, archive_candidates = build_best_archive(image_archive_name, meta_images)
+    if not best_archive:
+        return None
+    return move_best_archive(image_archive_name, best_archive, archive_candidates)
+
+def build_best_archive(image_archive_name, meta_images):
+    """Erstellt die Test-Archive aller aktiven Profile im Temp-Ordner.
+
+    Gibt (kleinstes Archiv, Liste aller fertigen Archive als (Pfad, Größe)) zurück, bei Fehlern (None, []).
+    """
 
     best_archive = None
     best_size = float('inf')
     archive_candidates = []
     temp_folder = config["paths"]["temp_folder"]
-    output_folder = config["paths"]["output_folder"]
 
-    for compression_profile in config["compression_profiles"]:
+    # Kommandos für alle Profile vorbereiten
+    commands = {}
+    for compression_profile, profile in config["compression_profiles"].items():
+        if not profile.get("active", 1):
+            continue
         temp_archive_name = f"{image_archive_name}_{compression_profile}"
-        
-        log_message(f"[INFO] Erstelle Test-Archiv mit Profil '{compression_profile}'...", 2)
-        temp_archive = create_archive(compression_profile, temp_archive_name, meta_images, temp_folder)
-        
-        if os.path.exists(temp_archive):
-            size = os.path.getsize(temp_archive)
-            log_message(f"[INFO] Archiv '{temp_archive}' erstellt ({size} Bytes)", 2)
+        cmd, output_path = build_archive_command(compression_profile, temp_archive_name, meta_images, temp_folder)
+        if cmd is not None:
+            commands[compression_profile] = (cmd, output_path)
 
+    if not commands:
+        log_message("[ERROR] Kein gültiges Archiv konnte erstellt werden!", 2)
+        return None, []
+
+    # Alle Profile treten gleichzeitig gegeneinander an
+    race = {"lock": threading.Lock(), "best_size": float('inf')}
+    with stage("archive"), ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        futures = []
+        for compression_profile, (cmd, output_path) in commands.items():
+            log_message(f"[INFO] Erstelle Test-Archiv mit Profil '{compression_profile}'...", 2)
+            futures.append(executor.submit(run_archive_candidate, compression_profile, cmd, output_path, race, meta_images))
+
+        for future in as_completed(futures):
+            result = future.result()
+            compression_profile = result["profile"]
+
+            if result["status"] == "aborted":
+                log_message(f"[INFO] Test-Archiv mit Profil '{compression_profile}' abgebrochen ({result['reason']})", 2)
+                continue
+
+            if result["status"] == "error":
+                print(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {result['error']}")
+                log_message(f"[ERROR] Fehler bei der Archivierung mit {compression_profile}: {result['error']}")
+                continue
+
+            temp_archive, size = result["path"], result["size"]
+            log_message(f"[INFO] Archiv '{temp_archive}' erstellt ({size} Bytes)", 2)
             archive_candidates.append((temp_archive, size))
 
             if size < best_size:
@@ -1053,7 +2413,13 @@ def create_best_archive(image_archive_name, meta_images):
 
     if not best_archive:
         log_message("[ERROR] Kein gültiges Archiv konnte erstellt werden!", 2)
-        return None
+        return None, []
+
+    return best_archive, archive_candidates
+
+def move_best_archive(image_archive_name, best_archive, archive_candidates):
+    """Verschiebt das kleinste Archiv in den Output-Ordner und löscht die übrigen Test-Archive."""
+    output_folder = config["paths"]["output_folder"]
 
     # Hole die Datei-Endung des kleinsten Archivs
     file_extension = os.path.splitext(best_archive)[1].lstrip('.')
@@ -1066,12 +2432,14 @@ def create_best_archive(image_archive_name, meta_images):
     log_message(f"[INFO] Bestes Archiv bestimmt: {best_archive} → {final_archive}", 2)
 
     # Prüfen, ob die Datei korrekt kopiert/verschoben wird
-    if verify_and_move_file(best_archive, final_archive):
+    with stage("move"):
+        moved = verify_and_move_file(best_archive, final_archive)
+    if moved:
         log_message(f"[INFO] Bestes Archiv '{best_archive}' wurde nach '{final_archive}' verschoben.")
 
         # Unnötige Archive löschen
         for archive, _ in archive_candidates:
-            if archive != best_archive:
+            if archive != best_archive and os.path.exists(archive):
                 os.remove(archive)
                 log_message(f"[INFO] Ungenutztes Archiv '{archive}' wurde gelöscht.", 2)
 
@@ -1080,11 +2448,9 @@ def create_best_archive(image_archive_name, meta_images):
 def verify_and_move_file(source, destination):
     """Überprüft die Integrität der Datei nach dem Kopieren/Verschieben."""
     
-    shutil.copy2(source, destination)
-
-    # Hashes vergleichen
-    source_hash = file_hash(source)  # Hash der Originaldatei
-    destination_hash = file_hash(destination)  # Hash der Zieldatei
+    # Der Hash der Quelle entsteht beim Kopieren, nur die Zieldatei wird noch einmal gelesen
+    source_hash = copy_with_digest(source, destination)
+    destination_hash = digest_file(destination)  # Hash der Zieldatei
 
     if source_hash == destination_hash:
         log_message(f"[INFO] Hash-Verifikation erfolgreich für '{destination}'", 2)
@@ -1095,6 +2461,875 @@ def verify_and_move_file(source, destination):
         log_message(f"[ERROR] Hash-Verifikation fehlgeschlagen für '{destination}'", 2)
         return False  # Originaldatei bleibt erhalten, um Datenverlust zu vermeiden
 
+######################################################################## 
+####                         BILD-METADATEN                         ####
+######################################################################## 
+
+def parse_exif_orientation(exif_data):
+    """Liest den Orientation-Tag (0x0112) aus IFD0 eines EXIF-Blocks (ohne 'Exif\\0\\0'-Präfix)."""
+    if len(exif_data) < 8:
+        return 1
+    byte_order = {b"II": "<", b"MM": ">"}.get(exif_data[:2])
+    if byte_order is None:
+        return 1
+
+    ifd_offset = struct.unpack(byte_order + "I", exif_data[4:8])[0]
+    if ifd_offset + 2 > len(exif_data):
+        return 1
+    num_entries = struct.unpack(byte_order + "H", exif_data[ifd_offset:ifd_offset + 2])[0]
+
+    for i in range(num_entries):
+        entry = ifd_offset + 2 + i * 12
+        if entry + 12 > len(exif_data):
+            break
+        tag = struct.unpack(byte_order + "H", exif_data[entry:entry + 2])[0]
+        if tag == 0x0112:
+            orientation = struct.unpack(byte_order + "H", exif_data[entry + 8:entry + 10])[0]
+            return orientation if 1 <= orientation <= 8 else 1
+    return 1
+
+def read_jpeg_header(f):
+    """Liest Breite, Höhe und EXIF-Orientierung aus den Markern vor den Bilddaten eines JPEGs."""
+    if f.read(2) != b"\xff\xd8":
+        return None
+
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue  # Ungültige Füllbytes überspringen
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)  # Füll-Bytes 0xFF zwischen Segmenten
+        if not marker:
+            return None
+        marker = marker[0]
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue  # Marker ohne Längenfeld
+        if marker in (0xD9, 0xDA):
+            return None  # Bilddaten bzw. Dateiende erreicht, ohne SOF gefunden zu haben
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+
+        if marker in JPEG_SOF_MARKERS:
+            sof = f.read(5)
+            if len(sof) < 5:
+                return None
+            height, width = struct.unpack(">HH", sof[1:5])
+            return width, height, orientation
+        elif marker == 0xE1:
+            segment = f.read(length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                orientation = parse_exif_orientation(segment[6:])
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+def read_png_header(f):
+    """Liest Breite und Höhe aus dem IHDR-Chunk einer PNG-Datei."""
+    header = f.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", header[16:24])
+    return width, height, 1
+
+def read_image_header(image_path):
+    """Ermittelt (Breite, Höhe, EXIF-Orientierung) ohne die Bilddaten zu dekodieren.
+
+    Die Größe entspricht den gespeicherten Pixeln (wie Image.size), die EXIF-Orientierung wird nur mitgeführt.
+    """
+    with open(image_path, "rb") as f:
+        signature = f.read(2)
+        f.seek(0)
+        if signature == b"\xff\xd8":
+            info = read_jpeg_header(f)
+        elif signature == b"\x89P":
+            info = read_png_header(f)
+        else:
+            info = None
+
+    if info is None:
+        # Unbekanntes Format oder ungewöhnlicher Header: Pillow liest ebenfalls nur den Header
+        with Image.open(image_path) as img:
+            exif_orientation = img.getexif().get(0x0112, 1)
+            info = (img.width, img.height, exif_orientation)
+    return info
+
+def get_image_info(image_path):
+    """Liefert (Breite, Höhe, EXIF-Orientierung) aus dem Metadaten-Index und scannt fehlende Bilder nach."""
+    key = os.path.abspath(image_path)
+    info = IMAGE_INFO_INDEX.get(key)
+    if info is None:
+        info = read_image_header(image_path)
+        with IMAGE_INFO_LOCK:
+            IMAGE_INFO_INDEX[key] = info
+    return info
+
+def scan_image_headers(image_list):
+    """Füllt den Metadaten-Index für eine Liste von Bildern in einem parallelen Header-Scan."""
+    pending = [path for path in image_list if os.path.abspath(path) not in IMAGE_INFO_INDEX]
+    if not pending:
+        return
+
+    def scan(path):
+        try:
+            return path, read_image_header(path)
+        except Exception as e:
+            log_message(f"[WARN] Header von {os.path.basename(path)} nicht lesbar: {e}", 2)
+            return path, None
+
+    workers = min(get_worker_count('integrity_workers'), len(pending))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scan, pending))
+
+    with IMAGE_INFO_LOCK:
+        for path, info in results:
+            if info is not None:
+                IMAGE_INFO_INDEX[os.path.abspath(path)] = info
+
+    log_message(f"Metadaten-Index: {len(pending)} Bild-Header gelesen.", 2)
+
+######################################################################## 
+####                  MANIFEST & INKREMENTELLER BATCH               ####
+######################################################################## 
+
+def get_manifest_path(image_subfolder):
+    """Pfad des Manifests zu einem Bilderordner (im Unterordner .ipt_manifests des Output-Ordners)."""
+    folder_key = hashlib.sha256(os.path.abspath(image_subfolder).encode("utf-8")).hexdigest()[:12]
+    manifest_name = f"{os.path.basename(image_subfolder)}_{folder_key}.json"
+    return os.path.join(config['paths']['output_folder'], ".ipt_manifests", manifest_name)
+
+def get_config_fingerprint():
+    """Hash über alle Config-Teile, die das erzeugte Archiv beeinflussen."""
+    parameters = {k: v for k, v in config['parameters'].items()
+                  if k not in MANIFEST_IGNORED_PARAMETERS and not k.startswith("_c_")}
+    profile_data = {
+        "script_version": SCRIPT_VERSION,
+        "parameters": parameters,
+        "tool_parameters": {k: v for k, v in config.items() if k.startswith("tool_parameters_")},
+        "tool_order": config.get('tool_order', {}),
+        "profile_selection": config.get('profile_selection', {}),
+        "compression_profiles": config.get('compression_profiles', {}),
+        "optimize_backend": config.get('optimize_backend', {}),
+        "pillow_parameters": config.get('pillow_parameters', {}),
+    }
+    return hashlib.sha256(json.dumps(profile_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+def find_source_files(base_folder, image_subfolder):
+    """Ermittelt die Dateien, aus denen das Archiv eines Ordners entsteht (Collage-Bilder + Bilderordner).
+
+    Gibt (Dateien, DirEntries für stat_source_files) zurück.
+    """
+    base_listing = scan_folder(base_folder)
+    subfolder_listing = scan_folder(image_subfolder)
+    names = {os.path.basename(path) for path in base_listing["files"]}
+    source_files = []
+    for base in COLLAGE_CANDIDATES:
+        for ext in COLLAGE_EXTENSIONS:
+            if base + ext in names:
+                source_files.append(os.path.join(base_folder, base + ext))
+                break
+
+    source_files.extend(subfolder_listing["files"])
+    return source_files, {**base_listing["entries"], **subfolder_listing["entries"]}
+
+def stat_source_files(source_files, entries=None):
+    """Liest Größe und Änderungszeit der Quelldateien (Pfad → (Größe, mtime_ns)).
+
+    Für Pfade mit DirEntry aus scan_folder wird dessen (zwischengespeicherter) stat verwendet.
+    """
+    entries = entries or {}
+    stats = {}
+    for path in source_files:
+        try:
+            stat = entries[path].stat() if path in entries else os.stat(path)
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            continue
+    return stats
+
+def write_manifest(base_folder, image_subfolder, archive, source_stats, config_profile, known_hashes=None):
+    """Schreibt das Manifest eines fertigen Archivs für spätere inkrementelle Läufe.
+
+    known_hashes müssen mit dem Verfahren aus get_integrity_digest berechnet sein.
+    """
+    known_hashes = known_hashes or {}
+    digest = get_integrity_digest()
+    files = []
+    for path, (size, mtime_ns) in sorted(source_stats.items()):
+        files.append({
+            "path": os.path.relpath(path, base_folder),
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "hash": known_hashes.get(path) or digest_file(path, digest),
+        })
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "script_version": SCRIPT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "base_folder": os.path.abspath(base_folder),
+        "image_subfolder": os.path.abspath(image_subfolder),
+        "archive": os.path.abspath(archive),
+        "config_profile": config_profile,
+        "digest": digest,
+        "files": files,
+    }
+
+    manifest_path = get_manifest_path(image_subfolder)
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(temp_path, manifest_path)
+        log_message(f"Manifest geschrieben: {manifest_path}", 2)
+    except OSError as e:
+        print(f"[WARN] Manifest konnte nicht geschrieben werden: {e}")
+        log_message(f"[WARN] Manifest konnte nicht geschrieben werden: {e}")
+
+def get_image_subfolder(base_folder):
+    """Liefert den einzigen Bilderordner eines Batch-Ordners oder None."""
+    subfolders = scan_folder(base_folder)["dirs"]
+    return subfolders[0] if len(subfolders) == 1 else None
+
+def manifest_is_current(base_folder, image_subfolder, mode):
+    """Prüft, ob das Archiv eines Ordners noch zum Manifest passt (mode 1 = Größe/mtime, 2 = Hash)."""
+    try:
+        with open(get_manifest_path(image_subfolder), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return False
+    if manifest.get("config_profile") != get_config_fingerprint():
+        return False
+    if not os.path.exists(manifest.get("archive", "")):
+        return False
+
+    recorded = {entry["path"]: entry for entry in manifest.get("files", [])}
+    current = stat_source_files(*find_source_files(base_folder, image_subfolder))
+    if set(recorded) != {os.path.relpath(path, base_folder) for path in current}:
+        return False
+
+    for path, (size, mtime_ns) in current.items():
+        entry = recorded[os.path.relpath(path, base_folder)]
+        if entry["size"] != size:
+            return False
+        if mode == 1 and entry["mtime_ns"] != mtime_ns:
+            return False
+        if mode == 2 and entry["hash"] != digest_file(path, manifest.get("digest", "sha256")):
+            return False
+
+    return True
+
+def is_folder_unchanged(base_folder, image_subfolder=None):
+    """Prüft im inkrementellen Modus, ob ein Ordner übersprungen werden kann."""
+    mode = config['parameters'].get('incremental', 0)
+    if mode not in (1, 2):
+        return False
+
+    try:
+        image_subfolder = image_subfolder or get_image_subfolder(base_folder)
+        if not image_subfolder:
+            return False
+        return manifest_is_current(base_folder, image_subfolder, mode)
+    except OSError:
+        return False
+
+######################################################################## 
+####                   JOURNAL & WIEDERAUFNAHME                     ####
+######################################################################## 
+
+def get_sources_fingerprint(source_stats):
+    """Hash über Pfade, Größen und Änderungszeiten der Quelldateien."""
+    sources = sorted((path, size, mtime_ns) for path, (size, mtime_ns) in source_stats.items())
+    return hashlib.sha256(json.dumps(sources).encode("utf-8")).hexdigest()
+
+def read_journal(journal_path):
+    """Liest die Einträge eines Journals. Eine unvollständige letzte Zeile (Abbruch beim Schreiben) wird ignoriert."""
+    entries = []
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+    except OSError:
+        pass
+    return entries
+
+def open_journal(temp_folder, image_subfolder, source_stats, config_profile):
+    """Öffnet das Journal eines Ordners (Write-Ahead-Log der abgeschlossenen Schritte).
+
+    Ein vorhandenes Journal wird nur übernommen, wenn Ordner, Quelldateien und Config-Profil unverändert sind,
+    sonst beginnt die Verarbeitung von vorn. Bei resume = 0 wird kein Journal geführt.
+    """
+    journal = {
+        "enabled": config['parameters'].get('resume', 0) == 1,
+        "path": os.path.join(temp_folder, JOURNAL_FILE),
+        "header": {
+            "step": "start",
+            "version": JOURNAL_VERSION,
+            "folder": os.path.abspath(image_subfolder),
+            "config_profile": config_profile,
+            "sources": get_sources_fingerprint(source_stats),
+        },
+        "steps": {},
+        "optimized": set(),
+    }
+
+    if not journal["enabled"]:
+        # Ein altes Journal passt nach einem Lauf ohne Journal nicht mehr zum Inhalt des Temp-Ordners
+        if os.path.exists(journal["path"]):
+            os.remove(journal["path"])
+        return journal
+
+    entries = read_journal(journal["path"])
+    if entries and entries[0] == journal["header"]:
+        for entry in entries[1:]:
+            if entry["step"] == "optimized":
+                journal["optimized"].add(entry["image"])
+            else:
+                journal["steps"][entry["step"]] = entry
+        if len(entries) > 1:
+            print(f"[INFO] Journal gefunden, die Verarbeitung wird nach Schritt '{entries[-1]['step']}' fortgesetzt.")
+            log_message(f"[INFO] Journal gefunden, die Verarbeitung wird nach Schritt '{entries[-1]['step']}' fortgesetzt.")
+        return journal
+
+    if entries:
+        log_message("[INFO] Veraltetes Journal verworfen (Quellen oder Config geändert).", 2)
+    restart_journal(journal)
+    return journal
+
+def restart_journal(journal):
+    """Beginnt ein leeres Journal, alle bisher erfassten Schritte verfallen."""
+    journal["steps"] = {}
+    journal["optimized"] = set()
+    if not journal["enabled"]:
+        return
+    os.makedirs(os.path.dirname(journal["path"]), exist_ok=True)
+    with open(journal["path"], "w", encoding="utf-8") as f:
+        f.write(json.dumps(journal["header"]) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def record_step(journal, step, sync=True, **data):
+    """Hängt einen abgeschlossenen Schritt an das Journal an.
+
+    Schritte werden per fsync gesichert, die häufigen Einträge je Bild (sync=False) nur bis in den Page-Cache.
+    """
+    if not journal["enabled"]:
+        return
+    entry = {"step": step, **data}
+    with open(journal["path"], "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+
+    if step == "optimized":
+        journal["optimized"].add(data["image"])
+    else:
+        journal["steps"][step] = entry
+
+def get_step(journal, step):
+    """Liefert den Journal-Eintrag eines Schritts, falls er abgeschlossen ist und seine Dateien (files) noch existieren."""
+    entry = journal["steps"].get(step)
+    if entry and all(os.path.exists(path) for path in entry.get("files", [])):
+        return entry
+    return None
+
+def close_journal(journal):
+    """Löscht das Journal nach erfolgreichem Abschluss eines Ordners."""
+    if journal["enabled"] and os.path.exists(journal["path"]):
+        os.remove(journal["path"])
+        log_message(f"Journal gelöscht: {journal['path']}", 2)
+
+######################################################################## 
+####                           BILD-CACHE                           ####
+######################################################################## 
+
+def get_cache_folder():
+    """Liefert den Cache-Ordner oder None, falls der Bild-Cache deaktiviert ist."""
+    if config['parameters'].get('cache', 0) != 1:
+        return None
+    return config['paths'].get('cache_folder') or None
+
+def get_tool_fingerprint(tool):
+    """Ermittelt einen Fingerabdruck des Tool-Executables, der sich bei einem Update ändert."""
+    if tool == PILLOW_TOOL:
+        return f"pillow-{PIL.__version__}"
+    if tool not in TOOL_FINGERPRINTS:
+        tool_path = config['tools'].get(tool, {}).get('path', "")
+        try:
+            stat = os.stat(tool_path)
+            TOOL_FINGERPRINTS[tool] = f"{stat.st_size}-{stat.st_mtime_ns}"
+        except OSError:
+            TOOL_FINGERPRINTS[tool] = "missing"
+    return TOOL_FINGERPRINTS[tool]
+
+def get_cache_key(input_hash, profile_name, tools, tool_params):
+    """Bildet den Cache-Schlüssel aus Eingabe-Hash, aufgelöstem Tool-Profil und Tool-Versionen."""
+    key_data = {
+        "input": input_hash,
+        "profile": profile_name,
+        "tools": [[tool, tool_params.get(tool, ""), get_tool_fingerprint(tool)] for tool in tools],
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+def get_cache_path(cache_key):
+    """Pfad der Cache-Datei, auf Unterordner nach den ersten beiden Hex-Zeichen verteilt."""
+    return os.path.join(get_cache_folder(), cache_key[:2], cache_key)
+
+def cache_lookup(cache_key, target_path):
+    """Kopiert das optimierte Ergebnis aus dem Cache über target_path. Liefert True bei einem Treffer."""
+    cache_path = get_cache_path(cache_key)
+    try:
+        shutil.copyfile(cache_path, target_path)
+        os.utime(cache_path)  # Zeitstempel für die LRU-Verdrängung auffrischen
+    except FileNotFoundError:
+        with CACHE_LOCK:
+            CACHE_STATS["misses"] += 1
+        return False
+    except OSError as e:
+        log_message(f"[WARN] Cache-Eintrag {cache_key} konnte nicht gelesen werden: {e}")
+        with CACHE_LOCK:
+            CACHE_STATS["misses"] += 1
+        return False
+
+    with CACHE_LOCK:
+        CACHE_STATS["hits"] += 1
+    return True
+
+def cache_store(cache_key, source_path):
+    """Legt das optimierte Bild im Cache ab (atomar über eine temporäre Datei)."""
+    cache_path = get_cache_path(cache_key)
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        log_message(f"[WARN] Cache-Eintrag {cache_key} konnte nicht gespeichert werden: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    with CACHE_LOCK:
+        CACHE_STATS["stores"] += 1
+
+def enforce_cache_limit():
+    """Verdrängt die am längsten nicht genutzten Einträge, sobald der Cache größer als erlaubt ist."""
+    cache_folder = get_cache_folder()
+    max_size = int(config['parameters'].get('cache_max_size_mb', 2048)) * 1024 * 1024
+    if not cache_folder or not os.path.isdir(cache_folder):
+        return
+
+    entries = []
+    total_size = 0
+    for bucket in os.scandir(cache_folder):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+    if total_size <= max_size:
+        return
+
+    # Älteste Einträge zuerst entfernen, bis wieder 90 % des Limits erreicht sind
+    entries.sort()
+    target_size = max_size * 0.9
+    for _, size, path in entries:
+        if total_size <= target_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+        with CACHE_LOCK:
+            CACHE_STATS["evictions"] += 1
+
+    log_message(f"Bild-Cache auf {total_size} Bytes verkleinert ({CACHE_STATS['evictions']} Einträge verdrängt).", 2)
+
+######################################################################## 
+####                      TOOL-STATISTIK (ADAPTIV)                  ####
+######################################################################## 
+
+def get_tool_stats_bucket(img_path, profile_name):
+    """Ordnet ein Bild einer Klasse zu: Profil, Dateigröße und Pixelzahl (jeweils in Zweierpotenz-Stufen)."""
+    try:
+        size = os.path.getsize(img_path)
+    except OSError:
+        return None
+    width, height, _ = get_image_info(img_path)
+    size_class = int(math.log2(size)) if size > 0 else 0
+    pixel_class = int(math.log2(width * height)) if width and height else 0
+    return f"{profile_name}|s{size_class}|p{pixel_class}"
+
+def load_tool_stats():
+    """Lädt die gespeicherte Tool-Statistik aus dem Cache-Ordner (einmal pro Prozess)."""
+    cache_folder = get_cache_folder()
+    if not cache_folder or TOOL_STATS["loaded"]:
+        return
+    try:
+        with open(os.path.join(cache_folder, TOOL_STATS_FILE), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    with TOOL_STATS_LOCK:
+        TOOL_STATS["entries"] = entries
+        TOOL_STATS["loaded"] = True
+
+def get_tool_stats_entry(bucket, tool):
+    """Summe aus gespeicherter Statistik und den noch nicht gespeicherten Messungen dieses Prozesses."""
+    key = f"{bucket}|{tool}"
+    with TOOL_STATS_LOCK:
+        stored = TOOL_STATS["entries"].get(key, {})
+        pending = TOOL_STATS["pending"].get(key, {})
+        return {field: stored.get(field, 0) + pending.get(field, 0) for field in TOOL_STATS_FIELDS}
+
+def record_tool_run(bucket, tool, size_before, size_after, duration):
+    """Merkt sich Ersparnis und Laufzeit eines Tool-Aufrufs für die spätere Vorhersage."""
+    key = f"{bucket}|{tool}"
+    with TOOL_STATS_LOCK:
+        entry = TOOL_STATS["pending"].setdefault(key, dict.fromkeys(TOOL_STATS_FIELDS, 0))
+        entry["runs"] += 1
+        entry["input_bytes"] += size_before
+        entry["saved_bytes"] += size_before - size_after
+        entry["seconds"] += duration
+        entry["useful"] += 1 if size_after < size_before else 0
+
+def select_tools(img_path, tools, profile_name):
+    """Liefert (Tool-Kette, Klasse): im adaptiven Modus ohne Tools, deren erwartete Ersparnis unter der Schwelle liegt.
+
+    Jedes adaptive_sample_rate-te Bild durchläuft trotzdem die volle Kette, damit die Statistik aktuell bleibt.
+    """
+    if not profile_name or not get_cache_folder():
+        return tools, None
+    load_tool_stats()
+    bucket = get_tool_stats_bucket(img_path, profile_name)
+    if bucket is None or config['parameters'].get('adaptive_tools', 0) != 1:
+        return tools, bucket
+
+    sample_rate = int(config['parameters'].get('adaptive_sample_rate', 10))
+    if sample_rate > 0 and next(TOOL_STATS_SAMPLE_COUNTER) % sample_rate == 0:
+        return tools, bucket
+
+    min_samples = int(config['parameters'].get('adaptive_min_samples', 20))
+    min_saving = float(config['parameters'].get('adaptive_min_saving', 0.2))
+    selected = []
+    for tool in tools:
+        entry = get_tool_stats_entry(bucket, tool)
+        if entry["runs"] >= min_samples and entry["input_bytes"] > 0 \
+                and entry["saved_bytes"] * 100.0 / entry["input_bytes"] < min_saving:
+            continue
+        selected.append(tool)
+    return selected, bucket
+
+def save_tool_stats():
+    """Speichert die Messungen dieses Prozesses und übernimmt dabei Einträge paralleler Prozesse."""
+    cache_folder = get_cache_folder()
+    if not cache_folder:
+        return
+    with TOOL_STATS_LOCK:
+        pending = TOOL_STATS["pending"]
+        TOOL_STATS["pending"] = {}
+    if not pending:
+        return
+
+    stats_path = os.path.join(cache_folder, TOOL_STATS_FILE)
+    try:
+        with open(stats_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+
+    # Die Messungen werden auf den aktuellen Dateistand addiert, damit parallele Prozesse sich nicht überschreiben
+    for key, delta in pending.items():
+        entry = entries.setdefault(key, dict.fromkeys(TOOL_STATS_FIELDS, 0))
+        for field in TOOL_STATS_FIELDS:
+            entry[field] = entry.get(field, 0) + delta[field]
+
+    with TOOL_STATS_LOCK:
+        TOOL_STATS["entries"] = entries
+        TOOL_STATS["loaded"] = True
+
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        temp_path = f"{stats_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temp_path, stats_path)
+    except OSError as e:
+        log_message(f"[WARN] Tool-Statistik konnte nicht gespeichert werden: {e}")
+
+######################################################################## 
+####                      TRACING & RESSOURCEN                      ####
+######################################################################## 
+
+def read_process_io():
+    """Gelesene und geschriebene Bytes des Prozesses aus /proc/self/io (nur Linux, sonst None)."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            values = dict(line.split(": ", 1) for line in f.read().splitlines() if ": " in line)
+        return int(values["rchar"]), int(values["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def read_resource_usage():
+    """Momentaufnahme für einen Span: CPU-Zeit der Kindprozesse, Spitzen-RSS (KB) und I/O-Zähler."""
+    snapshot = {"io": read_process_io(), "child_cpu": None, "peak_rss_kb": None}
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        snapshot["child_cpu"] = children.ru_utime + children.ru_stime
+        # ru_maxrss ist unter macOS in Bytes, sonst in KB angegeben
+        snapshot["peak_rss_kb"] = own.ru_maxrss // 1024 if sys.platform == "darwin" else own.ru_maxrss
+    return snapshot
+
+def start_trace():
+    """Beginnt eine neue Aufzeichnung für den aktuellen Ordner (nur bei trace = 1)."""
+    with TRACE_LOCK:
+        TRACE["enabled"] = config['parameters'].get('trace', 0) == 1
+        TRACE["events"] = []
+        TRACE["origin"] = time.perf_counter()
+
+@contextlib.contextmanager
+def span(name, category, **args):
+    """Zeichnet einen Abschnitt mit Wandzeit, Kind-CPU-Zeit, I/O-Bytes und Spitzen-RSS auf.
+
+    Der Aufrufer kann über das gelieferte Dictionary weitere Werte ergänzen (z.B. eingesparte Bytes).
+    Kind-CPU und I/O sind prozessweite Zähler, bei parallelen Spans enthalten sie auch die Arbeit der anderen.
+    """
+    if not TRACE["enabled"]:
+        yield args
+        return
+
+    before = read_resource_usage()
+    start_time = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end_time = time.perf_counter()
+        after = read_resource_usage()
+        if after["child_cpu"] is not None:
+            args["child_cpu_s"] = round(after["child_cpu"] - before["child_cpu"], 6)
+            args["peak_rss_kb"] = after["peak_rss_kb"]
+        if after["io"] is not None and before["io"] is not None:
+            args["read_bytes"] = after["io"][0] - before["io"][0]
+            args["write_bytes"] = after["io"][1] - before["io"][1]
+        event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": round((start_time - TRACE["origin"]) * 1e6, 1), "dur": round((end_time - start_time) * 1e6, 1),
+                 "args": args}
+        with TRACE_LOCK:
+            TRACE["events"].append(event)
+
+def summarize_trace(events):
+    """Fasst die Spans nach Name zusammen (Anzahl, Zeiten, I/O, eingesparte Bytes, Spitzen-RSS)."""
+    rows: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for event in events:
+        row = rows.setdefault((event["cat"], event["name"]), {"count": 0, "wall": 0.0, "child_cpu": 0.0, "read": 0,
+                                                              "write": 0, "saved": 0, "peak_rss_kb": 0})
+        args = event["args"]
+        row["count"] += 1
+        row["wall"] += event["dur"] / 1e6
+        row["child_cpu"] += args.get("child_cpu_s", 0.0)
+        row["read"] += args.get("read_bytes", 0)
+        row["write"] += args.get("write_bytes", 0)
+        row["saved"] += args.get("saved_bytes", 0)
+        row["peak_rss_kb"] = max(row["peak_rss_kb"], args.get("peak_rss_kb", 0))
+    return rows
+
+def finish_trace(base_folder):
+    """Schreibt die Aufzeichnung als Chrome-Trace (chrome://tracing, Perfetto) und gibt eine Übersichtstabelle aus."""
+    with TRACE_LOCK:
+        if not TRACE["enabled"]:
+            return None
+        events = TRACE["events"]
+        TRACE["enabled"] = False
+        TRACE["events"] = []
+
+    folder_name = os.path.basename(os.path.normpath(base_folder)) or "ipt"
+    trace_path = os.path.join(os.path.dirname(resolve_log_file()), f"ipt_trace_{LOG_TIMESTAMP}_{folder_name}.json")
+    metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": f"ipt {folder_name}"}}]
+    try:
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+    except OSError as e:
+        log_message(f"[WARN] Trace konnte nicht gespeichert werden: {e}")
+        trace_path = None
+
+    lines = [f"{'Bereich':<10} {'Name':<28} {'Anzahl':>6} {'Wand s':>8} {'Kind-CPU s':>10} {'Gelesen MB':>10} "
+             f"{'Geschrieben MB':>14} {'Gespart KB':>10} {'RSS MB':>7}"]
+    for (category, name), row in summarize_trace(events).items():
+        lines.append(f"{category:<10} {name[:28]:<28} {row['count']:>6} {row['wall']:>8.2f} {row['child_cpu']:>10.2f} "
+                     f"{row['read'] / 1048576:>10.1f} {row['write'] / 1048576:>14.1f} {row['saved'] / 1024:>10.1f} "
+                     f"{row['peak_rss_kb'] / 1024:>7.1f}")
+    table = "\n".join(lines)
+    print(f"[INFO] Trace {folder_name}{f' gespeichert: {trace_path}' if trace_path else ''}\n{table}")
+    log_message(f"Trace {folder_name}{f' gespeichert: {trace_path}' if trace_path else ''}\n{table}")
+    return trace_path
+
+######################################################################## 
+####                         TOOL-AUSFÜHRUNG                        ####
+######################################################################## 
+
+def get_tool_settings(tool):
+    """Liefert die Einstellungen eines Tools bzw. Kompressionsprofils (Pfad, Timeout, Slots)."""
+    if tool in config.get('tools', {}):
+        return config['tools'][tool]
+    return config.get('compression_profiles', {}).get(tool, {})
+
+def get_tool_slot_count(tool):
+    """Liefert die konfigurierte Anzahl Slots eines Tools (0 = unbegrenzt)."""
+    try:
+        return max(0, int(get_tool_settings(tool).get('slots', 0)))
+    except (TypeError, ValueError):
+        return 0
+
+def create_tool_slots():
+    """Legt prozessübergreifende Slots für alle begrenzten Tools an (für die Worker-Prozesse eines Pools).
+
+    Ohne diese Slots hätte jeder Worker-Prozess eigene Semaphoren, die Grenze gälte dann nur je Prozess.
+    """
+    tools = list(config.get('tools', {})) + list(config.get('compression_profiles', {}))
+    return {tool: multiprocessing.BoundedSemaphore(get_tool_slot_count(tool))
+            for tool in tools if get_tool_slot_count(tool) > 0}
+
+def set_tool_slots(tool_slots):
+    """Übernimmt die vom Hauptprozess angelegten Tool-Slots in einen Worker-Prozess."""
+    with TOOL_SLOTS_LOCK:
+        TOOL_SLOTS.update(tool_slots or {})
+
+def get_tool_slot(tool):
+    """Semaphore für die maximale Anzahl gleichzeitiger Aufrufe eines Tools (None = unbegrenzt).
+
+    In Worker-Prozessen sind die Slots bereits über set_tool_slots() gesetzt und gelten über alle Prozesse.
+    """
+    with TOOL_SLOTS_LOCK:
+        if tool not in TOOL_SLOTS:
+            slots = get_tool_slot_count(tool)
+            TOOL_SLOTS[tool] = threading.BoundedSemaphore(slots) if slots > 0 else None
+        return TOOL_SLOTS[tool]
+
+def kill_tool_process(proc):
+    """Beendet ein Tool samt seiner Prozessgruppe und wartet auf das Ende."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass  # Bereits beendet
+    proc.wait()
+
+def stream_tool_output(stream, label, is_stderr, tail):
+    """Leitet die Ausgabe eines Tools zeilenweise ins Log weiter, nur die letzten Zeilen bleiben im Speicher."""
+    for line in stream:
+        line = line.rstrip()
+        if not line:
+            continue
+        tail.append(line)
+        if is_stderr:
+            log_message(f"[ERROR] {label} Fehler: {line}")
+        else:
+            log_message(f"[DEBUG] {label} output: {line}", 2)
+    stream.close()
+
+def run_tool(tool, cmd, label=None, should_abort=None):
+    """Führt ein Tool ohne Shell aus: mit Timeout, Slot-Begrenzung, gestreamter Ausgabe und Laufzeit-Protokoll.
+
+    should_abort wird während des Laufs regelmäßig aufgerufen und kann einen Abbruchgrund (Text) liefern.
+    """
+    label = label or tool
+    try:
+        timeout = float(get_tool_settings(tool).get('timeout', 0))
+    except (TypeError, ValueError):
+        timeout = 0.0
+    run = {"tool": tool, "label": label, "returncode": None, "duration": 0.0, "timed_out": False,
+           "aborted": None, "error": None, "tail": collections.deque(maxlen=TOOL_OUTPUT_TAIL)}
+
+    slot = get_tool_slot(tool)
+    if slot is not None:
+        slot.acquire()
+    start_time = time.perf_counter()
+    try:
+        try:
+            # Eigene Prozessgruppe (Unix), damit beim Abbruch auch Kindprozesse des Tools beendet werden
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                                    errors="replace", start_new_session=(os.name == "posix"))
+        except OSError as e:
+            run["error"] = str(e)
+            return run
+
+        readers = [threading.Thread(target=stream_tool_output, args=(stream, label, is_stderr, run["tail"]), daemon=True)
+                   for stream, is_stderr in ((proc.stdout, False), (proc.stderr, True))]
+        for reader in readers:
+            reader.start()
+
+        deadline = start_time + timeout if timeout > 0 else None
+        while True:
+            try:
+                proc.wait(timeout=TOOL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if deadline is not None and time.perf_counter() > deadline:
+                    run["timed_out"] = True
+                elif should_abort is not None:
+                    run["aborted"] = should_abort()
+                if run["timed_out"] or run["aborted"]:
+                    kill_tool_process(proc)
+                    break
+
+        for reader in readers:
+            reader.join()
+        run["returncode"] = proc.returncode
+        if run["timed_out"]:
+            run["error"] = f"Timeout nach {timeout:.0f}s, Prozess beendet"
+        elif not run["aborted"] and proc.returncode != 0:
+            run["error"] = f"Exit-Code {proc.returncode}"
+        return run
+    finally:
+        if slot is not None:
+            slot.release()
+        run["duration"] = time.perf_counter() - start_time
+        run["tail"] = list(run["tail"])
+        log_message(f"[DEBUG] {label}: Exit-Code {run['returncode']} nach {run['duration']:.2f}s"
+                    + (f" ({run['error'] or run['aborted']})" if run['error'] or run['aborted'] else ""), 2)
+        with TOOL_RUNS_LOCK:
+            TOOL_RUNS.append({key: run[key] for key in ("tool", "returncode", "duration", "timed_out", "aborted", "error")})
+
+def log_tool_summary():
+    """Schreibt die gesammelten Laufzeiten je Tool ins Log und leert die Liste für den nächsten Ordner."""
+    with TOOL_RUNS_LOCK:
+        runs = TOOL_RUNS[:]
+        TOOL_RUNS.clear()
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for run in runs:
+        entry = summary.setdefault(run["tool"], {"count": 0, "duration": 0.0, "max": 0.0, "failed": 0, "timeouts": 0})
+        entry["count"] += 1
+        entry["duration"] += run["duration"]
+        entry["max"] = max(entry["max"], run["duration"])
+        entry["failed"] += 1 if run["error"] else 0
+        entry["timeouts"] += 1 if run["timed_out"] else 0
+
+    for tool, entry in summary.items():
+        log_message(f"Tool {tool}: {entry['count']} Aufrufe, {entry['duration']:.1f}s gesamt, max. {entry['max']:.1f}s, "
+                    f"{entry['failed']} fehlgeschlagen, {entry['timeouts']} Timeouts", 2)
+
 ######################################################################## 
 ####                    NACHBEREITUNG & SÄUBERN                     ####
 ######################################################################## 
@@ -1114,6 +3349,155 @@ def clear_temp_folder():
 ####                           MAIN CORE                            ####
 ######################################################################## 
 
+def get_job_temp_name(base_folder):
+    """Name des Temp-Ordners eines Batch-Jobs: Ordnername plus Kurz-Hash des absoluten Pfads.
+
+    Gleichnamige Ordner aus verschiedenen Verzeichnissen (z.B. zwei Dienst-Jobs /a/Vol1 und /b/Vol1) dürfen sich
+    keinen Temp-Ordner teilen.
+    """
+    folder_key = hashlib.sha256(os.path.abspath(base_folder).encode("utf-8")).hexdigest()[:12]
+    return f"{os.path.basename(os.path.normpath(base_folder))}_{folder_key}"
+
+def run_batch_job(job_config, base_folder, log_timestamp):
+    """Bearbeitet einen Batch-Ordner mit eigener Config-Kopie, eigenem Temp-Ordner und eigenem Log-Kontext."""
+    global config, LOG_TIMESTAMP, JOB_NAME
+
+    previous_state = (config, LOG_TIMESTAMP, JOB_NAME)
+    job_name = os.path.basename(os.path.normpath(base_folder))
+
+    # Die Job-Config ist eine Kopie, damit Anpassungen (z.B. collage = 0) nicht in den nächsten Job durchschlagen
+    config = job_config
+    LOG_TIMESTAMP = log_timestamp
+    JOB_NAME = job_name
+    config['paths']['temp_folder'] = os.path.join(config['paths']['temp_folder'], get_job_temp_name(base_folder))
+
+    result = {"folder": base_folder, "status": "ok", "archive": None, "size": 0, "error": None}
+    start_time = time.perf_counter()
+
+    try:
+        log_message(f"Batch-Job für {base_folder} beginnt (PID {os.getpid()})", 2)
+        archive = process_images(base_folder)
+        if archive and os.path.exists(archive):
+            result["archive"] = archive
+            result["size"] = os.path.getsize(archive)
+        else:
+            result["status"] = "abgebrochen"
+    except Exception as e:
+        result["status"] = "fehler"
+        result["error"] = str(e)
+        print(f"[ERROR] Batch-Job {job_name} fehlgeschlagen: {e}")
+        log_message(f"[ERROR] Batch-Job {job_name} fehlgeschlagen: {e}")
+    finally:
+        result["duration"] = time.perf_counter() - start_time
+        release_temp_space()  # Abgebrochene Jobs dürfen die Pipeline nicht blockieren
+        flush_log()  # Worker-Prozesse enden ohne atexit, daher hier alles Ausstehende schreiben
+        config, LOG_TIMESTAMP, JOB_NAME = previous_state
+
+    return result
+
+def log_batch_summary(results, duration):
+    """Gibt eine zusammengefasste Statistik über alle Batch-Jobs aus."""
+    ok = [r for r in results if r["status"] == "ok"]
+    skipped = [r for r in results if r["status"] == "übersprungen"]
+    aborted = [r for r in results if r["status"] == "abgebrochen"]
+    failed = [r for r in results if r["status"] == "fehler"]
+    total_size = sum(r["size"] for r in ok)
+    job_time = sum(r["duration"] for r in results)
+
+    summary = (f"Batch abgeschlossen: {len(results)} Ordner in {duration:.1f}s "
+               f"(Summe der Job-Zeiten {job_time:.1f}s) - {len(ok)} erfolgreich, {len(skipped)} unverändert übersprungen, "
+               f"{len(aborted)} abgebrochen, {len(failed)} fehlgeschlagen, {total_size} Bytes Archivgröße")
+    print(f"[INFO] {summary}")
+    log_message(summary)
+
+    for r in aborted:
+        log_message(f"[WARN] Abgebrochen: {r['folder']} ({r['duration']:.1f}s)")
+    for r in failed:
+        log_message(f"[ERROR] Fehlgeschlagen: {r['folder']} - {r['error']}")
+
+def create_pipeline_slots():
+    """Legt die prozessübergreifenden Slots der Stufen-Pipeline an (leer, wenn die Pipeline nicht aktiv ist).
+
+    Gibt (Ressourcenklasse → Semaphore, Ressourcenklasse → Anzahl) zurück.
+    """
+    if not config.get('pipeline', {}).get('active', 0):
+        return {}, {}
+    counts = {resource: get_worker_count(f"{resource}_slots", 1, 'pipeline') for resource in PIPELINE_RESOURCES}
+    counts["staged"] = get_worker_count('max_staged', 2, 'pipeline')
+    return {resource: multiprocessing.BoundedSemaphore(count) for resource, count in counts.items()}, counts
+
+def init_pipeline_worker(slots, tool_slots=None):
+    """Initialisiert einen Worker-Prozess des Batch-Pools mit den Slots der Stufen-Pipeline und der Tools."""
+    set_tool_slots(tool_slots)
+    PIPELINE["slots"] = slots
+    PIPELINE["holds_temp"] = False
+
+def run_batch(input_folder):
+    """Verarbeitet alle Unterordner des Batch-Ordners, bei batch_workers > 1 in parallelen Prozessen.
+
+    Die Ordner werden schon während des scandir-Durchlaufs verteilt, die Verarbeitung beginnt mit dem ersten Fund.
+    Bei aktiver Stufen-Pipeline belegt jeder Schritt einen Slot seiner Ressourcenklasse (siehe stage()).
+    """
+    incremental = config['parameters'].get('incremental', 0) in (1, 2)
+    slots, slot_counts = create_pipeline_slots()
+    if slots:
+        # Stufen-Pipeline: so viele Ordner in Arbeit, wie Slots vorhanden sind (wartend im Temp-Ordner + je Stufe)
+        workers = slot_counts["staged"] + sum(slot_counts[resource] for resource in PIPELINE_RESOURCES if resource != "io")
+        cpu_sharing = slot_counts["cpu"]
+        log_message(f"Stufen-Pipeline aktiv: {slot_counts}", 2)
+    else:
+        workers = get_worker_count('batch_workers', 1)
+        cpu_sharing = workers
+    log_message(f"Batchmodus beginnt mit {workers} Worker-Prozess(en)", 2)
+
+    job_config = copy.deepcopy(config)
+    if cpu_sharing > 1 and int(job_config['parameters'].get('optimize_workers', 0)) <= 0:
+        # Die CPU-Kerne werden auf die parallel optimierenden Jobs aufgeteilt, statt jeden Job alle Kerne belegen zu lassen
+        job_config['parameters']['optimize_workers'] = max(1, (os.cpu_count() or 1) // cpu_sharing)
+
+    results = []
+    start_time = time.perf_counter()
+
+    def pending_folders():
+        # Inkrementeller Modus: Ordner, deren Manifest noch passt, werden gar nicht erst verteilt
+        for base_folder in iter_batch_folders(input_folder):
+            if incremental and is_folder_unchanged(base_folder):
+                log_message(f"Unverändert, wird übersprungen: {base_folder}", 2)
+                results.append({"folder": base_folder, "status": "übersprungen", "archive": None,
+                                "size": 0, "error": None, "duration": 0.0})
+            else:
+                yield base_folder
+
+    if workers == 1:
+        for base_folder in pending_folders():
+            results.append(run_batch_job(copy.deepcopy(job_config), base_folder, LOG_TIMESTAMP))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_pipeline_worker,
+                                 initargs=(slots, create_tool_slots())) as executor:
+            futures = {}
+
+            def collect(done):
+                for future in done:
+                    base_folder = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # z.B. abgestürzter Worker-Prozess
+                        result = {"folder": base_folder, "status": "fehler", "archive": None,
+                                  "size": 0, "error": str(e), "duration": 0.0}
+                    results.append(result)
+                    print(f"[INFO] Batch-Job {os.path.basename(result['folder'])}: {result['status']} ({len(results)} abgeschlossen)")
+
+            for base_folder in pending_folders():
+                futures[executor.submit(run_batch_job, job_config, base_folder, LOG_TIMESTAMP)] = base_folder
+                # Die Erkennung läuft höchstens zwei Jobs je Worker voraus, statt den ganzen Hauptordner vorab einzureihen
+                if len(futures) >= workers * 2:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(as_completed(list(futures)))
+
+    log_batch_summary(results, time.perf_counter() - start_time)
+    return results
+
 def main(config):
     """Hauptfunktion zur Steuerung der Bildverarbeitung."""
     global LOG_TIMESTAMP
@@ -1123,20 +3507,487 @@ def main(config):
     log_message("Programmstart")
     debug_log("Programm erfolgreich gestartet", 2)
 
+    # Dienst-Modus (Hot-Folder und/oder Socket)
+    if config.get('daemon', {}).get('active', 0):
+        HotFolderDaemon().run()
     # Einzelmodus
-    if config['parameters']['batch_mode'] == 0:
+    elif config['parameters']['batch_mode'] == 0:
         base_folder = os.path.dirname(config['paths']['base_folder_single'])
         subfolder = config['paths']['base_folder_single']
         log_message(f"Einzelmodus beginnt", 2)
+        if is_folder_unchanged(base_folder, subfolder):
+            print(f"[INFO] Der Ordner {subfolder} ist unverändert und wird übersprungen.")
+            log_message(f"Der Ordner {subfolder} ist unverändert und wird übersprungen.")
+            return
         process_images(base_folder, subfolder)
     # Batchmodus
     else:
-        input_folder = config['paths']['base_folder_batch']
-        for subfolder in os.listdir(input_folder):
-            base_folder = os.path.join(input_folder, subfolder)
-            if os.path.isdir(base_folder):  # Stellt sicher, dass nur Ordner verarbeitet werden
-                log_message(f"Batchmodus beginnt", 2)
-                process_images(base_folder)
+        run_batch(config['paths']['base_folder_batch'])
+
+######################################################################## 
+####                    DIENST-MODUS (HOT-FOLDER)                   ####
+######################################################################## 
+
+class InotifyWatcher:
+    """Meldet Änderungen unterhalb des Hot-Folders über inotify (Linux, per ctypes ohne Zusatzpakete)."""
+
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fehlgeschlagen")
+        self.root = root
+        self.wake_r, self.wake_w = os.pipe()  # Weckt wait() beim Beenden des Dienstes auf
+        os.set_blocking(self.wake_w, False)
+        self.watches: Dict[int, str] = {}  # Watch-Deskriptor → Job-Ordner (None für den Hot-Folder selbst)
+        self.watched_paths = set()
+        self.add(root, None)
+
+    def add(self, path, job_folder):
+        """Überwacht ein Verzeichnis; Ereignisse darin werden dem Job-Ordner zugeordnet."""
+        if path in self.watched_paths:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_MASK)
+        if wd < 0:
+            # z.B. max_user_watches erreicht: der regelmäßige Vollscan fängt diese Ordner trotzdem auf
+            log_message(f"[WARN] inotify-Überwachung für {path} nicht möglich (errno {ctypes.get_errno()})", 2)
+            return
+        self.watches[wd] = job_folder
+        self.watched_paths.add(path)
+
+    def wait(self, timeout):
+        """Wartet auf Ereignisse und liefert die betroffenen Job-Ordner, None bedeutet: alles neu scannen."""
+        ready, _, _ = select.select([self.fd, self.wake_r], [], [], timeout)
+        if self.fd not in ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + 16 <= len(data):
+                wd, mask, _cookie, name_len = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + name_len].rstrip(b"\0")
+                offset += 16 + name_len
+                if mask & INOTIFY_Q_OVERFLOW:
+                    return None
+                if mask & INOTIFY_IGNORED:
+                    self.watched_paths.discard(self.watches.pop(wd, None))
+                    continue
+                job_folder = self.watches.get(wd)
+                if job_folder is None and name:
+                    job_folder = os.path.join(self.root, os.fsdecode(name))
+                if job_folder:
+                    changed.add(job_folder)
+        return changed
+
+    def wake(self):
+        try:
+            os.write(self.wake_w, b"x")
+        except OSError:
+            pass
+
+    def close(self):
+        for fd in (self.fd, self.wake_r, self.wake_w):
+            os.close(fd)
+
+class PollingWatcher:
+    """Fallback ohne inotify: jeder Aufruf von wait() führt zu einem Vollscan nach poll_interval Sekunden."""
+
+    def __init__(self, root):
+        self.root = root
+        self.wake_event = threading.Event()
+
+    def add(self, path, job_folder):
+        pass
+
+    def wait(self, timeout):
+        self.wake_event.wait(timeout)
+        return None
+
+    def wake(self):
+        self.wake_event.set()
+
+    def close(self):
+        pass
+
+def create_watcher(root, mode):
+    """Wählt inotify, wo verfügbar (oder erzwungen), sonst Polling."""
+    if mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except OSError as e:
+            print(f"[WARN] inotify nicht verfügbar ({e}), verwende Polling.")
+            log_message(f"[WARN] inotify nicht verfügbar ({e}), verwende Polling.")
+    return PollingWatcher(root)
+
+def folder_signature(job_folder, watcher=None):
+    """Signatur eines Job-Ordners (Anzahl Dateien, Gesamtgröße, jüngste Änderung) zur Erkennung abgeschlossener Kopien."""
+    count, total_size, newest = 0, 0, 0
+    folders = [job_folder]
+    while folders:
+        folder = folders.pop()
+        if watcher is not None:
+            watcher.add(folder, job_folder)
+        try:
+            listing = scan_folder(folder)
+        except OSError:
+            continue  # Ordner wurde zwischendurch verschoben oder gelöscht
+        folders.extend(path for path in listing["dirs"] if not listing["entries"][path].is_symlink())  # Wie os.walk
+        for path in listing["files"]:
+            try:
+                st = listing["entries"][path].stat()
+            except OSError:
+                continue  # Datei wurde zwischendurch verschoben oder gelöscht
+            count += 1
+            total_size += st.st_size
+            newest = max(newest, st.st_mtime_ns)
+    return (count, total_size, newest)
+
+def get_daemon_socket_path():
+    """Pfad des UNIX-Sockets (leer in der Config = temp_folder/ipt_daemon.sock)."""
+    return config.get('daemon', {}).get('socket_path') or os.path.join(config['paths']['temp_folder'], "ipt_daemon.sock")
+
+def warm_worker(tool_slots=None):
+    """Initialisiert einen Worker-Prozess vorab, damit der erste Job nicht auf den Start warten muss."""
+    if tool_slots:
+        set_tool_slots(tool_slots)
+    load_numpy()
+    return os.getpid()
+
+class DaemonJobHandler(socketserver.StreamRequestHandler):
+    """Eine JSON-Zeile pro Verbindung: {"cmd": "submit"|"status"|"shutdown", ...}, Antwort ebenfalls als JSON-Zeile."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+            response = self.server.daemon_state.handle_request(request)
+        except ValueError as e:
+            response = {"ok": False, "error": f"Ungültige Anfrage: {e}"}
+        self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+
+class HotFolderDaemon:
+    """Langlebiger Dienst: überwacht den Hot-Folder, nimmt Jobs über den Socket an und verteilt sie auf einen warmen Prozess-Pool."""
+
+    def __init__(self):
+        daemon_config = config['daemon']
+        self.watch_folder = daemon_config.get('watch_folder') or config['paths']['base_folder_batch']
+        self.settle_seconds = float(daemon_config.get('settle_seconds', 2))
+        self.poll_interval = float(daemon_config.get('poll_interval', 5))
+        self.workers = get_worker_count('workers', 2, 'daemon')
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.jobs_lock = threading.Lock()
+        self.futures = {}  # Job-ID → Future, solange der Job wartet oder läuft
+        self.job_counter = 0
+        self.active_folders = set()  # Wartende oder laufende Job-Ordner
+        self.stop_event = threading.Event()
+        self.executor = None
+        self.server = None
+        self.watcher = None
+
+        # Ordner, die das Programm selbst beschreibt, dürfen nicht als Jobs erkannt werden
+        self.excluded = {os.path.normpath(os.path.abspath(config['paths'][key]))
+                         for key in ('output_folder', 'temp_folder', 'cache_folder') if config['paths'].get(key)}
+
+        self.job_config = copy.deepcopy(config)
+        if self.workers > 1 and int(self.job_config['parameters'].get('optimize_workers', 0)) <= 0:
+            self.job_config['parameters']['optimize_workers'] = max(1, (os.cpu_count() or 1) // self.workers)
+
+    def start_pool(self):
+        """Startet den Prozess-Pool und wärmt alle Worker vor."""
+        load_numpy()  # Vor dem fork laden, damit die Worker das Modul erben
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker,
+                                            initargs=(create_tool_slots(),))
+        pids = {f.result() for f in [self.executor.submit(warm_worker) for _ in range(self.workers)]}
+        log_message(f"Dienst: {len(pids)} Worker-Prozess(e) bereit", 2)
+
+    def submit(self, job_folder, source):
+        """Reiht einen Job-Ordner ein und liefert die Job-ID (oder None, falls er bereits ansteht)."""
+        job_folder = os.path.normpath(os.path.abspath(job_folder))
+        with self.jobs_lock:
+            if job_folder in self.active_folders:
+                return None
+            self.job_counter += 1
+            job_id = f"job-{self.job_counter}"
+            self.jobs[job_id] = {"id": job_id, "folder": job_folder, "source": source, "status": "wartend",
+                                 "submitted": time.time(), "archive": None, "size": 0, "error": None, "duration": 0.0}
+            self.active_folders.add(job_folder)
+            self.prune_jobs()
+
+        print(f"[INFO] Dienst: {job_id} eingereiht ({source}): {job_folder}")
+        log_message(f"Dienst: {job_id} eingereiht ({source}): {job_folder}")
+
+        try:
+            future = self.executor.submit(run_batch_job, copy.deepcopy(self.job_config), job_folder, LOG_TIMESTAMP)
+        except BrokenProcessPool:
+            # Ein abgestürzter Worker macht den Pool unbrauchbar, daher neu starten
+            log_message("[WARN] Dienst: Prozess-Pool defekt, wird neu gestartet")
+            self.start_pool()
+            future = self.executor.submit(run_batch_job, copy.deepcopy(self.job_config), job_folder, LOG_TIMESTAMP)
+
+        with self.jobs_lock:
+            self.futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self.job_done(job_id, f))
+        return job_id
+
+    def job_done(self, job_id, future):
+        """Übernimmt das Ergebnis eines Jobs (läuft im Verwaltungsthread des Pools)."""
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"status": "fehler", "archive": None, "size": 0, "error": str(e), "duration": 0.0}
+        with self.jobs_lock:
+            job = self.jobs[job_id]
+            job.update({key: result[key] for key in ("status", "archive", "size", "error", "duration")})
+            job["finished"] = time.time()
+            self.active_folders.discard(job["folder"])
+            self.futures.pop(job_id, None)
+        latency = job["finished"] - job["submitted"]
+        print(f"[INFO] Dienst: {job_id} {job['status']} nach {latency:.1f}s ({job['folder']})")
+        log_message(f"Dienst: {job_id} {job['status']} nach {latency:.1f}s (Verarbeitung {job['duration']:.1f}s): {job['folder']}")
+
+    def prune_jobs(self):
+        """Begrenzt die Job-Historie auf DAEMON_JOB_HISTORY abgeschlossene Einträge."""
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] not in ("wartend", "läuft")]
+        for job_id in finished[:max(0, len(finished) - DAEMON_JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    def handle_request(self, request):
+        """Bearbeitet eine Anfrage über den Socket."""
+        cmd = request.get("cmd")
+        if cmd == "submit":
+            job_folder = request.get("folder", "")
+            if not os.path.isdir(job_folder):
+                return {"ok": False, "error": f"Ordner nicht gefunden: {job_folder}"}
+            if self.stop_event.is_set():
+                return {"ok": False, "error": "Dienst wird beendet, keine neuen Jobs"}
+            job_id = self.submit(job_folder, "socket")
+            if job_id is None:
+                return {"ok": False, "error": "Ordner ist bereits eingereiht"}
+            return {"ok": True, "job": job_id}
+        if cmd == "status":
+            with self.jobs_lock:
+                for job_id, future in self.futures.items():
+                    if self.jobs[job_id]["status"] == "wartend" and future.running():
+                        self.jobs[job_id]["status"] = "läuft"
+                if request.get("job"):
+                    job = self.jobs.get(request["job"])
+                    if job is None:
+                        return {"ok": False, "error": f"Unbekannter Job: {request['job']}"}
+                    jobs = [dict(job)]
+                else:
+                    jobs = [dict(job) for job in self.jobs.values()]
+            return {"ok": True, "jobs": jobs}
+        if cmd == "shutdown":
+            self.stop()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unbekannter Befehl: {cmd}"}
+
+    def start_server(self):
+        """Startet den Socket-Server in einem eigenen Thread (nur mit AF_UNIX)."""
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            print("[WARN] UNIX-Sockets werden auf diesem System nicht unterstützt, Jobannahme nur über den Hot-Folder.")
+            return
+        socket_path = get_daemon_socket_path()
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # Überbleibsel eines abgebrochenen Laufs
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, DaemonJobHandler)
+        self.server.daemon_threads = True
+        self.server.daemon_state = self
+        threading.Thread(target=self.server.serve_forever, name="ipt-daemon-socket", daemon=True).start()
+        print(f"[INFO] Dienst nimmt Jobs über {socket_path} an.")
+        log_message(f"Dienst nimmt Jobs über {socket_path} an.")
+
+    def is_candidate(self, job_folder):
+        return (os.path.isdir(job_folder) and not os.path.basename(job_folder).startswith(".")
+                and os.path.normpath(os.path.abspath(job_folder)) not in self.excluded)
+
+    def watch(self, watcher):
+        """Hauptschleife: Ordner gelten als fertig, wenn sich ihre Signatur settle_seconds lang nicht ändert."""
+        pending: Dict[str, Tuple[Tuple[int, int, int], float]] = {}  # Ordner → (Signatur, Zeitpunkt der letzten Änderung)
+        done: Dict[str, Tuple[int, int, int]] = {}  # Ordner → Signatur bei der Übergabe
+        changed = None  # None = Vollscan
+        last_full_scan = 0.0
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if changed is None or now - last_full_scan >= DAEMON_FULL_SCAN_INTERVAL:
+                changed = set(iter_batch_folders(self.watch_folder))
+                last_full_scan = now
+
+            for job_folder in changed | set(pending):
+                if not self.is_candidate(job_folder):
+                    pending.pop(job_folder, None)
+                    continue
+                with self.jobs_lock:
+                    if job_folder in self.active_folders:
+                        continue
+                signature = folder_signature(job_folder, watcher)
+                if signature[0] == 0 or signature == done.get(job_folder):
+                    pending.pop(job_folder, None)
+                    continue
+                previous = pending.get(job_folder)
+                if previous is None or previous[0] != signature:
+                    pending[job_folder] = (signature, now)
+                elif now - previous[1] >= self.settle_seconds:
+                    del pending[job_folder]
+                    done[job_folder] = signature
+                    if config['parameters'].get('incremental', 0) in (1, 2) and is_folder_unchanged(job_folder):
+                        log_message(f"Dienst: unverändert, wird übersprungen: {job_folder}", 2)
+                        continue
+                    self.submit(job_folder, "hot-folder")
+
+            timeout = min(self.settle_seconds, self.poll_interval) if pending else self.poll_interval
+            changed = watcher.wait(timeout)
+
+    def stop(self):
+        """Beendet die Annahme neuer Jobs und weckt die Hauptschleife auf."""
+        self.stop_event.set()
+        if self.watcher is not None:
+            self.watcher.wake()
+
+    def run(self):
+        """Startet Pool, Socket und Überwachung und wartet beim Beenden auf alle eingereihten Jobs."""
+        self.start_pool()
+        self.start_server()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda signum, frame: self.stop())
+
+        try:
+            if config['daemon'].get('watch_mode', "auto") != "off" and os.path.isdir(self.watch_folder):
+                self.watcher = create_watcher(self.watch_folder, config['daemon'].get('watch_mode', "auto"))
+                print(f"[INFO] Dienst überwacht {self.watch_folder} ({type(self.watcher).__name__}).")
+                log_message(f"Dienst überwacht {self.watch_folder} ({type(self.watcher).__name__}).")
+                self.watch(self.watcher)
+            else:
+                self.stop_event.wait()
+        finally:
+            print("[INFO] Dienst wird beendet, laufende und eingereihte Jobs werden abgeschlossen ...")
+            log_message("Dienst wird beendet, laufende und eingereihte Jobs werden abgeschlossen")
+            if self.server is not None:
+                self.server.shutdown()
+                self.server.server_close()
+                try:
+                    os.remove(get_daemon_socket_path())
+                except OSError:
+                    pass
+            if self.watcher is not None:
+                self.watcher.close()
+            self.executor.shutdown(wait=True)
+
+        with self.jobs_lock:
+            results = [job for job in self.jobs.values()]
+        if results:
+            log_batch_summary(results, sum(job["duration"] for job in results))
+
+def daemon_request(request, socket_path=None):
+    """Sendet eine Anfrage an einen laufenden Dienst und liefert die Antwort (für CLI und andere Prozesse)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path or get_daemon_socket_path())
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("rb") as f:
+            return json.loads(f.readline().decode("utf-8"))
+
+######################################################################## 
+####                    BIBLIOTHEK & KOMMANDOZEILE                  ####
+######################################################################## 
+
+class Pipeline:
+    """Einstiegspunkt für die Nutzung als Bibliothek.
+
+    Die Pipeline arbeitet mit einer explizit übergebenen Config. Tools werden erst bei Bedarf geprüft.
+    Da die Verarbeitungsfunktionen die modulweite Config nutzen, ist pro Prozess immer eine Pipeline aktiv.
+    Jeder Aufruf arbeitet mit einer eigenen Kopie der Config, Anpassungen pro Ordner wirken nicht auf spätere Aufrufe.
+    """
+
+    def __init__(self, config_data: Dict[str, Any]):
+        check_config_version(config_data)
+        self.config = config_data
+
+    @classmethod
+    def from_file(cls, file_path: str = "config.json") -> "Pipeline":
+        """Erstellt eine Pipeline aus einer Config-Datei."""
+        return cls(load_config(file_path))
+
+    def activate(self) -> Dict[str, Any]:
+        """Macht eine Kopie der Config dieser Pipeline zur aktiven Config des Moduls und liefert sie zurück."""
+        global config
+        config = copy.deepcopy(self.config)
+        return config
+
+    def verify_tools(self, tools=None) -> None:
+        """Prüft die Tools vorab (sonst geschieht das erst beim ersten Einsatz)."""
+        self.activate()
+        verify_tool_paths(get_required_tools() if tools is None else tools)
+
+    def process_folder(self, base_folder: str, input_folder: str = None):
+        """Verarbeitet einen Ordner wie process_images und liefert den Pfad des Archivs (oder None)."""
+        self.activate()
+        return process_images(base_folder, input_folder)
+
+    def run_batch(self, input_folder: str = None):
+        """Verarbeitet alle Unterordner eines Batch-Ordners und liefert die Ergebnisse je Ordner."""
+        self.activate()
+        return run_batch(input_folder or self.config['paths']['base_folder_batch'])
+
+    def run(self) -> None:
+        """Führt den Lauf entsprechend der Config aus (Einzel- oder Batchmodus)."""
+        main(self.activate())
+
+def run_daemon_client(client_args):
+    """Reicht Ordner beim Dienst ein (submit=<ordner>) oder fragt den Status ab (status=<job> bzw. status=all)."""
+    exit_code = 0
+    for arg in client_args:
+        key, value = arg.split("=", 1)
+        if key == "submit":
+            request = {"cmd": "submit", "folder": os.path.abspath(value)}
+        else:
+            request = {"cmd": "status", "job": None if value in ("", "all") else value}
+        try:
+            response = daemon_request(request)
+        except OSError as e:
+            print(f"[ERROR] Dienst nicht erreichbar ({get_daemon_socket_path()}): {e}")
+            return 1
+        if not response.get("ok"):
+            print(f"[ERROR] {response.get('error')}")
+            exit_code = 1
+        elif key == "submit":
+            print(f"[INFO] {value} eingereicht als {response['job']}")
+        else:
+            for job in response["jobs"]:
+                print(f"[INFO] {job['id']}: {job['status']} - {job['folder']}" + (f" → {job['archive']}" if job['archive'] else ""))
+    return exit_code
+
+def cli(args=None):
+    """Kommandozeilen-Einstieg: Config laden, Tools prüfen, CLI-Parameter anwenden und starten."""
+    global config
+
+    try:
+        config = load_config()
+    except ConfigError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"{config['program']['name']} - Version {SCRIPT_VERSION}\nCopyright 2025 HBB under AGPLv3")
+
+    # Client eines laufenden Dienstes: Job einreichen oder Status abfragen, ohne Tools zu prüfen
+    client_args = [arg for arg in (sys.argv[1:] if args is None else args) if arg.startswith(("submit=", "status="))]
+    if client_args:
+        sys.exit(run_daemon_client(client_args))
+
+    try:
+        verify_tool_paths(get_required_tools())
+    except ToolNotFoundError:
+        sys.exit(1)  # Beenden, falls wichtige Tools fehlen
+
+    process_cli_args(args)
+    main(config)
 
 if __name__ == "__main__":
-    main(config)
\ No newline at end of file
+    cli()